@@ -0,0 +1,163 @@
+"""
+Benchmark the hash, classifier, combiners and networks on synthetic workloads.
+
+    python -m benchmarks.run                       # run, compare with baseline.json
+    python -m benchmarks.run --quick -k infer      # fewer repeats, only matching names
+    python -m benchmarks.run --update-baseline     # store the results as the new baseline
+
+Results are written as JSON, in seconds per operation. A benchmark slower than
+the baseline by more than the tolerance is a regression and makes the run exit
+with status 1. Baselines are only comparable on the same machine.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import timeit
+import numpy as np
+from hashtron.hash.hash import Hash
+from hashtron.classifier.constructor import Hashtron
+from hashtron.layer.full.layer import FullLayer
+from hashtron.layer.majpool2d.layer import MajPool2DLayer
+from hashtron.datasets.squareroot.api import medium
+from benchmarks.workloads import mnist_net, sqrt_net, byte_samples
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+def random_program(rng: random.Random, length: int) -> list:
+    # Decreasing moduli, like trained weights
+    program = [[rng.randint(0, 0xFFFFFFFF), rng.randint(1 << 20, 1 << 31)]]
+    for _ in range(length - 1):
+        program.append([rng.randint(0, 0xFFFFFFFF), rng.randint(1, 1 << 16)])
+    return program
+
+def bench_hash():
+    n = 10000
+    def run():
+        for i in range(n):
+            Hash.hash(i, 0x1234567, 1 << 20)
+    yield 'hash.hash', run, n
+
+    strs = ['%016x' % random.Random(i).getrandbits(64) for i in range(1000)]
+    def run():
+        for s in strs:
+            Hash.string_hash(0, s)
+    yield 'hash.string_hash', run, len(strs)
+
+    arr = np.arange(1 << 20, dtype=np.uint32)
+    yield 'hash.hash_array', lambda: Hash.hash_array(arr, 0x1234567, 1 << 20), len(arr)
+
+def bench_forward():
+    rng = random.Random(0)
+    n = 2000
+    for length in (1, 4, 16):
+        for bits in (1, 4):
+            tron = Hashtron.new(random_program(rng, length), bits)
+            fwd = tron.forward
+            def run(fwd=fwd):
+                for i in range(n):
+                    fwd.forward(i, False)
+            yield f'forward.forward[len={length},bits={bits}]', run, n
+
+def bench_combiners():
+    rng = random.Random(1)
+    # Input widths of the MNIST shaped net: 80 cells pooled by 4, 5 cells fully read
+    layers = [
+        ('majpool2d', MajPool2DLayer(1*5*1*4*4, 1, 1, 1, 4, 1, 1), 80, 20),
+        ('full', FullLayer(5, 1, 1), 5, 5),
+    ]
+    for name, layer, cells, features in layers:
+        bits = [rng.random() < 0.5 for _ in range(cells)]
+        def run(layer=layer, bits=bits, features=features):
+            combiner = layer.lay()
+            for i, v in enumerate(bits):
+                combiner.put(i, v)
+            for m in range(features):
+                combiner.feature(m)
+        yield f'combiner.{name}', run, 1
+
+def bench_infer():
+    for name, tron, samples in (('mnist', mnist_net(), byte_samples(100)), ('sqrt', sqrt_net(), medium()[:100])):
+        network = tron.network
+        def run(network=network, samples=samples):
+            for s in samples:
+                network.infer(s)
+        yield f'infer.{name}', run, len(samples)
+        yield f'infer_batch.{name}', lambda network=network, samples=samples: network.infer_batch(samples), len(samples)
+
+SUITES = [bench_hash, bench_forward, bench_combiners, bench_infer]
+
+def measure(fn, ops: int, repeat: int) -> float:
+    """
+    Best time of one operation in seconds, over `repeat` timed loops of about 0.2s.
+    """
+    timer = timeit.Timer(fn)
+    loops, _ = timer.autorange()
+    return min(timer.repeat(repeat, loops)) / loops / ops
+
+def run(pattern: str = None, repeat: int = 5) -> dict:
+    results = {}
+    for suite in SUITES:
+        for name, fn, ops in suite():
+            if pattern and pattern not in name:
+                continue
+            results[name] = measure(fn, ops, repeat)
+            print(f'{name:40s} {results[name] * 1e9:14.1f} ns/op', flush=True)
+    return results
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Names of the benchmarks slower than their baseline by more than the tolerance.
+    """
+    regressions = []
+    for name, seconds in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        change = seconds / base - 1
+        flag = 'REGRESSION' if change > tolerance else ''
+        print(f'{name:40s} {change * 100:+7.1f}% {flag}')
+        if change > tolerance:
+            regressions.append(name)
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Run the hashtron benchmarks.')
+    parser.add_argument('-o', '--output', default='benchmark-results.json', help='results file to write')
+    parser.add_argument('--baseline', default=BASELINE, help='baseline results to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown, 0.25 is 25%%')
+    parser.add_argument('-k', dest='pattern', help='only run the benchmarks whose name contains this')
+    parser.add_argument('--quick', action='store_true', help='one timed loop per benchmark')
+    parser.add_argument('--update-baseline', action='store_true', help='write the results to the baseline')
+    args = parser.parse_args(argv)
+
+    results = run(args.pattern, 1 if args.quick else 5)
+    report = {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)['results']
+        report['results'] = {**baseline, **results}
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f'no baseline at {args.baseline}, nothing to compare')
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)['results']
+    return 1 if compare(results, baseline, args.tolerance) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
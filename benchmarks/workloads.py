@@ -0,0 +1,70 @@
+"""
+Synthetic networks and samples of the benchmarks, also used by the tests.
+
+The networks have random but well formed weights, they don't classify
+anything, their outputs only serve to compare evaluation strategies.
+"""
+
+import random
+from hashtron.net.feedforward.net import Net
+from hashtron.layer.majpool2d.layer import MajPool2DLayer
+from hashtron.layer.full.layer import FullLayer
+from hashtron.datasets.stringhash.bytehash import ByteSample, BalancedByteSample
+from hashtron.datasets.squareroot.api import MediumClasses
+
+def randomize(tron, seed: int):
+    """
+    Give every hashtron of the net a random program.
+
+    The moduli decrease along the program, like trained weights.
+
+    :param tron: The `Net`, modified in place.
+    :param seed: Seed of the random programs.
+    :return: The net.
+    """
+    rng = random.Random(seed)
+    for layer in tron.network.layers:
+        for cell in layer:
+            maxx = rng.randint(1 << 20, 1 << 31)
+            program = [[rng.randint(0, 0xFFFFFFFF), maxx]]
+            for _ in range(rng.randint(0, 4)):
+                program.append([rng.randint(0, 0xFFFFFFFF), rng.randint(1, 1 << 16)])
+            cell.program = program
+    return tron
+
+def mnist_net(seed: int = 0):
+    """
+    Net with the topology of the MNIST net, random weights.
+    """
+    tron = Net.new()
+    tron.new_layer(1*5*1*4*1*4, 0, 1<<(4*4*2//3))
+    tron.new_combiner(MajPool2DLayer(1*5*1*4*4, 1, 1, 1, 4, 1, 1))
+    tron.new_layer(1*5*1*4, 0, 1<<(4*4*2//3))
+    tron.new_combiner(MajPool2DLayer(1*5*4, 1, 1, 1, 4, 1, 1))
+    tron.new_layer(1*5, 0, 1<<(5*5*2//3))
+    tron.new_combiner(FullLayer(5, 1, 1))
+    return randomize(tron, seed)
+
+def sqrt_net(seed: int = 0):
+    """
+    Net with the topology of the square root net, random weights.
+    """
+    tron = Net.new()
+    tron.new_layer(3*12*3*12, 0, 1<<12)
+    tron.new_combiner(MajPool2DLayer(3*12*12, 1, 3, 1, 12, 1, 1))
+    tron.new_layer(3*12, 0, 1<<12)
+    tron.new_combiner(MajPool2DLayer(12, 1, 3, 1, 12, 1, 1))
+    tron.new_layer(1, MediumClasses)
+    return randomize(tron, seed)
+
+def byte_samples(count: int, size: int = 169, seed: int = 0) -> list:
+    """
+    Random byte buffer samples, alternating `ByteSample` and `BalancedByteSample`.
+    """
+    rng = random.Random(seed)
+    samples = []
+    for i in range(count):
+        buf = bytes(rng.randint(0, 255) for _ in range(size))
+        cls = BalancedByteSample if i % 2 else ByteSample
+        samples.append(cls(buf, i % 10))
+    return samples
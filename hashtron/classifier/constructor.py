@@ -1,4 +1,5 @@
 import random
+import numpy as np
 from hashtron.classifier.model import HashtronModel
 from hashtron.classifier.forward import HashtronForward
 from hashtron.classifier.view import HashtronView
@@ -15,3 +16,75 @@ class Hashtron:
     def new(program=None, bits=1):
         return Hashtron(program, bits)
 
+    @property
+    def program(self):
+        if self._program is None and self._program_array is not None:
+            self._program = self._program_array.tolist()
+        return self._program
+
+    @program.setter
+    def program(self, program):
+        # Replacing the program invalidates the compiled stages
+        self._program = program
+        self._program_array = None
+        self._stages = None
+
+    def load_program_array(self, program: np.ndarray) -> None:
+        """
+        Use an array of (salt, modulus) rows as the program.
+
+        The array, e.g. a view into a memory-mapped model, is used as is and
+        only converted to lists when `program` is read.
+
+        :param program: Array of shape (stages, 2).
+        """
+        self._program = None
+        self._program_array = program
+        self._stages = None
+
+    def stages(self) -> tuple[list[int], list[int]]:
+        """
+        Get the compiled program, the effective (salt, modulus) of every stage.
+
+        The program is compiled once and cached until it is replaced.
+
+        :return: Flat lists of the cumulative salts and moduli per stage.
+        """
+        if self._stages is None:
+            self._stages = self.compile()
+        return self._stages
+
+    def compile(self) -> tuple[list[int], list[int]]:
+        """
+        Compile the program into flat lists of effective salts and moduli.
+
+        Stage i hashes with salt s0 ^ s1 ^ ... ^ si and modulus m0 - m1 - ... - mi.
+
+        :return: Lists of salts and moduli, empty for an empty program.
+        """
+        if self._program is None and self._program_array is not None:
+            return self._compile_array(self._program_array)
+        salts = []
+        moduli = []
+        if not self._program:
+            return salts, moduli
+        ss, maxx = self._program[0]
+        salts.append(ss)
+        moduli.append(maxx)
+        for i in range(1, len(self._program)):
+            s, max_val = self._program[i]
+            ss ^= s
+            maxx -= max_val
+            salts.append(ss)
+            moduli.append(maxx)
+        return salts, moduli
+
+    @staticmethod
+    def _compile_array(program: np.ndarray) -> tuple[list[int], list[int]]:
+        if len(program) == 0:
+            return [], []
+        salts = np.bitwise_xor.accumulate(program[:, 0])
+        moduli = program[:, 1].astype(np.int64)
+        # m0 - m1 - ... - mi == 2 * m0 - (m0 + m1 + ... + mi)
+        moduli = 2 * moduli[0] - np.cumsum(moduli)
+        return salts.tolist(), moduli.tolist()
@@ -1,3 +1,4 @@
+import numpy as np
 from hashtron.hash.hash import Hash
 
 class HashtronForward:
@@ -5,21 +6,43 @@ class HashtronForward:
         self.hashtron = hashtron
 
     def forward(self, sample: int, negate: bool) -> int:
-        if not self.hashtron.program:
+        salts, moduli = self.hashtron.stages()
+        if not salts:
             return 0
+        bits = self.hashtron.bits
+        hash_fn = Hash.hash
         out = 0
-        for j in range(self.hashtron.bits):
-            input_val = sample if self.hashtron.bits <= 1 else sample | (j << 16)
-            ss, maxx = self.hashtron.program[0]
-            input_val = Hash.hash(input_val, ss, maxx)
-            for i in range(1, len(self.hashtron.program)):
-                s, max_val = self.hashtron.program[i]
-                ss ^= s
-                maxx -= max_val
-                input_val = Hash.hash(input_val, ss, maxx)
+        for j in range(bits):
+            input_val = sample if bits <= 1 else sample | (j << 16)
+            for s, max_val in zip(salts, moduli):
+                input_val = hash_fn(input_val, s, max_val)
             input_val &= 1
             if negate:
                 input_val ^= 1
             if input_val != 0:
                 out |= 1 << j
         return out
+
+    def forward_array(self, samples, negate: bool) -> np.ndarray:
+        """
+        Vectorized form of `forward` over an array of samples.
+
+        :param samples: Array-like of uint32 input values.
+        :param negate: Whether to negate the output bits.
+        :return: uint32 array of outputs, one per sample.
+        """
+        samples = np.asarray(samples).astype(np.uint32, copy=False)
+        salts, moduli = self.hashtron.stages()
+        out = np.zeros(samples.shape, dtype=np.uint32)
+        if not salts:
+            return out
+        bits = self.hashtron.bits
+        for j in range(bits):
+            input_val = samples if bits <= 1 else samples | np.uint32(j << 16)
+            for s, max_val in zip(salts, moduli):
+                input_val = Hash.hash_array(input_val, s, max_val)
+            input_val &= np.uint32(1)
+            if negate:
+                input_val ^= np.uint32(1)
+            out |= input_val << np.uint32(j)
+        return out
@@ -15,6 +15,24 @@ class TestHashtronForward(unittest.TestCase):
         # Check if the expected integer is the output
         self.assertIs(0, result)
 
+    def test_forward_recompile(self):
+        tron = Hashtron.new([[1, 4], [3, 1]], 2)
+        self.assertEqual(tron.stages(), ([1, 2], [4, 3]))
+
+        # Replacing the program must invalidate the compiled stages
+        tron.view.read_json('[[5, 1000], [6, 10], [7, 5]]')
+        self.assertEqual(tron.stages(), ([5, 3, 4], [1000, 990, 985]))
+        self.assertEqual(tron.forward.forward(123, False), 1)
+        self.assertEqual(tron.forward.forward(123, True), 2)
+
+    def test_forward_array_negative_modulus(self):
+        # The cumulative modulus 10 - 20 is negative
+        tron = Hashtron.new([[1, 10], [3, 20]], 2)
+        samples = list(range(0, 1 << 20, 997))
+        for negate in (False, True):
+            expected = [tron.forward.forward(x, negate) for x in samples]
+            self.assertEqual(tron.forward.forward_array(samples, negate).tolist(), expected)
+
 
 if __name__ == '__main__':
     unittest.main()
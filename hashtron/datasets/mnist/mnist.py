@@ -2,47 +2,59 @@ import gzip
 import os
 import hashlib
 import random
-from typing import List, Tuple
+import stat
+from typing import List, Optional, Tuple
+import numpy as np
 from hashtron.hash.hash import Hash
 import tempfile
 import urllib.request
-from hashtron.datasets.stringhash.bytehash import ByteSample
+from hashtron.datasets.stringhash.bytehash import byte_feature, gather_features
+from hashtron.net.sample import Sample, buffer_digest
 from io import BytesIO
 
 # Constants
 ImgSize = 28
 SmallImgSize = 13
 
-class Input:
+class Input(Sample):
     """Represents an original 28x28 MNIST image."""
-    def __init__(self, image: List[int], label: int):
-        self.buf = bytes(image)
-        self.label = label
+    # The image is a view into a dataset array which may change, nothing is memoized
+    memoize = False
 
-    def feature(self, n: int) -> int:
-        return ByteSample(self.buf, self.label).feature(n)
+    def __init__(self, image: np.ndarray, label: int):
+        # A view into the dataset buffer, not a copy
+        self.image = np.asarray(image, dtype=np.uint8).reshape(-1)
+        self.buf = memoryview(self.image)
+        self.label = int(label)
 
-    def parity(self) -> int:
-        return 0
+    def __getstate__(self):
+        # memoryview can't be pickled, it is recreated from the image
+        state = self.__dict__.copy()
+        del state['buf']
+        return state
 
-    def output(self) -> int:
-        return self.label
-
-class SmallInput:
-    """Represents a downsampled 13x13 MNIST image."""
-    def __init__(self, image: List[int], label: int):
-        self.buf = bytes(image)
-        self.label = label
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.buf = memoryview(self.image)
 
     def feature(self, n: int) -> int:
-        return ByteSample(self.buf, self.label).feature(n)
+        return byte_feature(self.buf, n)
+
+    def features(self, count: int) -> np.ndarray:
+        return gather_features(self.image, count)
 
     def parity(self) -> int:
         return 0
 
+    def fingerprint(self):
+        return (type(self), buffer_digest(self.buf))
+
     def output(self) -> int:
         return self.label
 
+class SmallInput(Input):
+    """Represents a downsampled 13x13 MNIST image."""
+
 def download_mnist() -> str:
     """Downloads MNIST files to a temporary directory."""
     dst_dir = tempfile.gettempdir()
@@ -63,8 +75,8 @@ def download_mnist() -> str:
                     f.write(data)
     return dst_dir
 
-def _load_file(file_name: str, expected_hash: str, dataset_dir: str = None) -> bytes:
-    """Loads and verifies a gzipped MNIST file."""
+def _find_file(file_name: str, dataset_dir: str = None) -> str:
+    """Finds a MNIST file in the dataset directories."""
     search_dirs = [
         '/tmp/mnist/',
         os.path.expanduser('~/pyclassifier/datasets/mnist/')
@@ -74,52 +86,100 @@ def _load_file(file_name: str, expected_hash: str, dataset_dir: str = None) -> b
     for dir_path in search_dirs:
         file_path = os.path.join(dir_path, file_name)
         if os.path.exists(file_path):
-            with open(file_path, 'rb') as f:
-                data = f.read()
-                file_hash = hashlib.sha256(data).hexdigest()
-                if file_hash != expected_hash:
-                    raise ValueError(f"Hash mismatch for {file_path}")
-                with gzip.GzipFile(fileobj=BytesIO(data)) as gz:
-                    return gz.read()
+            return file_path
     raise FileNotFoundError(f"{file_name} not found in {search_dirs}")
 
-def load_images(file_name: str, expected_hash: str, dataset_dir: str) -> Tuple[List[List[int]], List[List[int]]]:
-    """Loads images and generates original and downsampled versions."""
-    data = _load_file(file_name, expected_hash, dataset_dir)
-    image_data = data[16:]  # Skip header
-    num_images = len(image_data) // (ImgSize * ImgSize)
-    original = []
-    small = []
-    for i in range(num_images):
-        # Extract original image
-        start = i * ImgSize * ImgSize
-        original_img = list(image_data[start: start + ImgSize * ImgSize])
-        original.append(original_img)
-        # Generate small image
-        cropped = []
-        # Crop to 26x26 (remove 1px border)
-        for y in range(1, ImgSize - 1):
-            row = image_data[start + y*ImgSize + 1 : start + (y+1)*ImgSize - 1]
-            cropped.extend(row)
-        # Downsample to 13x13 using max pooling
-        small_img = []
-        for y in range(SmallImgSize):
-            for x in range(SmallImgSize):
-                offset = 2 * (y * (ImgSize - 2) + x)
-                block = [
-                    cropped[offset],
-                    cropped[offset + 1],
-                    cropped[offset + (ImgSize - 2)],
-                    cropped[offset + (ImgSize - 2) + 1]
-                ]
-                small_img.append(max(block))
-        small.append(small_img)
+def _load_file(file_name: str, expected_hash: str, dataset_dir: str = None) -> bytes:
+    """Loads and verifies a gzipped MNIST file."""
+    file_path = _find_file(file_name, dataset_dir)
+    with open(file_path, 'rb') as f:
+        data = f.read()
+        file_hash = hashlib.sha256(data).hexdigest()
+        if file_hash != expected_hash:
+            raise ValueError(f"Hash mismatch for {file_path}")
+        with gzip.GzipFile(fileobj=BytesIO(data)) as gz:
+            return gz.read()
+
+def _cache_paths(file_name: str, expected_hash: str, dataset_dir: str = None) -> Optional[Tuple[str, str, str]]:
+    """
+    Paths of the decoded image caches and of their digests, next to the verified file.
+
+    Returns None when other users may write into that directory, like the temp dir.
+    """
+    directory = os.path.dirname(os.path.abspath(_find_file(file_name, dataset_dir)))
+    st = os.stat(directory)
+    if st.st_mode & (stat.S_IWGRP | stat.S_IWOTH) or (hasattr(os, 'getuid') and st.st_uid != os.getuid()):
+        return None
+    stem = os.path.join(directory, f"{file_name}.{expected_hash[:16]}")
+    return stem + '.28.npy', stem + '.13.npy', stem + '.sha256'
+
+def _file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _load_cache(paths: Tuple[str, str, str]):
+    """Memory-maps the cached images if their digests match, None otherwise."""
+    original_path, small_path, digest_path = paths
+    try:
+        with open(digest_path) as f:
+            digests = f.read().split()
+        if digests != [_file_digest(original_path), _file_digest(small_path)]:
+            return None
+        return np.load(original_path, mmap_mode='r'), np.load(small_path, mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+
+def decode_images(data: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    """Decodes IDX image data into original and downsampled image arrays."""
+    original = np.frombuffer(data, dtype=np.uint8, offset=16).reshape(-1, ImgSize, ImgSize)
+    # Crop to 26x26 (remove 1px border)
+    cropped = original[:, 1:ImgSize - 1, 1:ImgSize - 1]
+    # Downsample to 13x13 using max pooling over 2x2 blocks
+    small = cropped.reshape(-1, SmallImgSize, 2, SmallImgSize, 2).max(axis=(2, 4))
     return original, small
 
-def load_labels(file_name: str, expected_hash: str, dataset_dir: str) -> List[int]:
+def load_images(file_name: str, expected_hash: str, dataset_dir: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Loads images and generates original and downsampled versions.
+
+    Returns uint8 arrays of shape (N, 28, 28) and (N, 13, 13). The decoded arrays
+    are cached as .npy files next to the dataset file, with their sha256 digests,
+    and memory-mapped on later loads. Directories other users may write into
+    get no cache.
+    """
+    paths = _cache_paths(file_name, expected_hash, dataset_dir)
+    if paths is not None:
+        cached = _load_cache(paths)
+        if cached is not None:
+            return cached
+    data = _load_file(file_name, expected_hash, dataset_dir)
+    original, small = decode_images(data)
+    if paths is None:
+        return original, small
+    original_path, small_path, digest_path = paths
+    try:
+        _save_atomic(original_path, lambda f: np.save(f, original))
+        _save_atomic(small_path, lambda f: np.save(f, small))
+        digests = f"{_file_digest(original_path)} {_file_digest(small_path)}\n"
+        _save_atomic(digest_path, lambda f: f.write(digests.encode()))
+    except OSError:
+        # Read-only dataset directory
+        return original, small
+    return np.load(original_path, mmap_mode='r'), np.load(small_path, mmap_mode='r')
+
+def _save_atomic(path: str, write) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+def load_labels(file_name: str, expected_hash: str, dataset_dir: str) -> np.ndarray:
     """Loads MNIST labels."""
     data = _load_file(file_name, expected_hash, dataset_dir)
-    return list(data[8:])  # Skip header
+    return np.frombuffer(data, dtype=np.uint8, offset=8)  # Skip header
 
 def load_mnist(dataset_dir: str = None) -> Tuple[List[Input], List[Input], List[SmallInput], List[SmallInput]]:
     """Loads all MNIST datasets (original and small, train and test)."""
@@ -1,5 +1,11 @@
-from hashtron.datasets.mnist.mnist import load_mnist
+from hashtron.datasets.mnist.mnist import load_mnist, load_images, Input, SmallInput
 import unittest
+import os
+import gzip
+import random
+import hashlib
+import tempfile
+import numpy as np
 
 class TestMnist(unittest.TestCase):
     def test_mnist(self):
@@ -35,6 +41,61 @@ class TestMnist(unittest.TestCase):
             print(f"Label: {sample.label}, Feature 0: {sample.feature(0)}")
             break
 
+    def test_load_images(self):
+        # Synthetic IDX file, compared to a pixel by pixel crop and max pool
+        rng = random.Random(0)
+        images = [[rng.randint(0, 255) for _ in range(28 * 28)] for _ in range(5)]
+        data = gzip.compress(bytes(16) + bytes(p for image in images for p in image))
+        with tempfile.TemporaryDirectory() as dataset_dir:
+            with open(os.path.join(dataset_dir, 'images.gz'), 'wb') as f:
+                f.write(data)
+            expected_hash = hashlib.sha256(data).hexdigest()
+            for _ in range(2):
+                # The second load is served from the memory-mapped cache
+                original, small = load_images('images.gz', expected_hash, dataset_dir)
+                self.assertEqual(original.shape, (5, 28, 28))
+                self.assertEqual(small.shape, (5, 13, 13))
+                for i, image in enumerate(images):
+                    self.assertEqual(original[i].reshape(-1).tolist(), image)
+                    expected = [max(image[(2 * y + dy + 1) * 28 + 2 * x + dx + 1] for dy in (0, 1) for dx in (0, 1))
+                                for y in range(13) for x in range(13)]
+                    self.assertEqual(small[i].reshape(-1).tolist(), expected)
+                    self.assertEqual(Input(original[i], 3).feature(123), Input(image, 3).feature(123))
+                    self.assertEqual(SmallInput(small[i], 3).feature(5), SmallInput(expected, 3).feature(5))
+            self.assertTrue(any(name.endswith('.npy') for name in os.listdir(dataset_dir)))
+            del original, small
+
+            # A corrupt cache fails its digest and is rebuilt from the verified file
+            cache = [name for name in os.listdir(dataset_dir) if name.endswith('.28.npy')][0]
+            with open(os.path.join(dataset_dir, cache), 'r+b') as f:
+                f.seek(-1, os.SEEK_END)
+                last = f.read(1)[0]
+                f.seek(-1, os.SEEK_END)
+                f.write(bytes([last ^ 1]))
+            original, _ = load_images('images.gz', expected_hash, dataset_dir)
+            self.assertEqual(original[4].reshape(-1).tolist(), images[4])
+            del original
+
+    def test_shared_dir(self):
+        # Directories other users may write into, like the temp dir, get no cache
+        data = gzip.compress(bytes(16) + bytes(28 * 28))
+        with tempfile.TemporaryDirectory() as dataset_dir:
+            os.chmod(dataset_dir, 0o777)
+            with open(os.path.join(dataset_dir, 'images.gz'), 'wb') as f:
+                f.write(data)
+            original, _ = load_images('images.gz', hashlib.sha256(data).hexdigest(), dataset_dir)
+            self.assertEqual(original.shape, (1, 28, 28))
+            self.assertEqual(os.listdir(dataset_dir), ['images.gz'])
+
+    def test_mutable_image(self):
+        # Inputs view the image, their fingerprint follows its changes
+        image = np.arange(28 * 28, dtype=np.uint8)
+        sample = Input(image, 1)
+        fingerprint = sample.fingerprint()
+        image[0] ^= 1
+        self.assertNotEqual(sample.fingerprint(), fingerprint)
+        self.assertEqual(sample.fingerprint(), Input(image.copy(), 1).fingerprint())
+
 
 if __name__ == '__main__':
     unittest.main()
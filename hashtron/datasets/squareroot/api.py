@@ -1,18 +1,26 @@
 import math
+import numpy as np
 from typing import List
+from hashtron.net import sample
 
-class Sample:
+class Sample(sample.Sample):
     def __init__(self, value: int):
         self.value = value
 
     def feature(self, n: int) -> int:
         return self.value
 
+    def features(self, count: int) -> np.ndarray:
+        return np.full(count, self.value & 0xFFFFFFFF, dtype=np.uint32)
+
     def parity(self) -> int:
         # don't balance: return 0
         return 4
         # return self.value ^ (self.value << 3)
 
+    def fingerprint(self):
+        return (type(self), self.value)
+
     def output(self) -> int:
         return int(math.sqrt(self.value))
 
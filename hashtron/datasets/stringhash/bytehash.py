@@ -1,36 +1,86 @@
+import numpy as np
 from hashtron.hash.hash import Hash
+from hashtron.net.sample import Sample, buffer_array, buffer_digest
 
-class ByteSample:
+# Buffer size -> (index array, index rows), shared by all the samples
+_feature_indices = {}
+
+def _index_table(size: int, count: int) -> tuple:
+    table = _feature_indices.get(size)
+    if table is None or len(table[1]) < count:
+        n = max(64, count, 2 * len(table[1]) if table else 0)
+        array = Hash.hash_array(np.arange(n, dtype=np.uint32)[:, None], np.arange(4, dtype=np.uint32), size).astype(np.intp)
+        table = (array, [tuple(row) for row in array.tolist()])
+        _feature_indices[size] = table
+    return table
+
+def feature_indices(size: int, count: int) -> np.ndarray:
+    """
+    Get the buffer positions read by the first `count` byte features.
+
+    The positions only depend on the feature index and the buffer size, the
+    table is computed once per buffer size and shared by all the samples.
+
+    :param size: The buffer length.
+    :param count: The number of features.
+    :return: Array of shape (count, 4), row n holding Hash.hash(n, j, size) for j in 0..3.
+    """
+    return _index_table(size, count)[0][:count]
+
+def byte_feature(buf, n: int) -> int:
+    """
+    Compute the n-th byte feature of a buffer, four hashed bytes packed into an integer.
+
+    :param buf: The bytes of the sample.
+    :param n: The feature index.
+    :return: The feature.
+    """
+    i0, i1, i2, i3 = _index_table(len(buf), n + 1)[1][n]
+    return buf[i0] ^ (buf[i1] << 8) ^ (buf[i2] << 16) ^ (buf[i3] << 24)
+
+def gather_features(bufs: np.ndarray, count: int) -> np.ndarray:
+    """
+    Compute the first `count` byte features of one or many buffers at once.
+
+    :param bufs: uint8 array of shape (size,) or (batch, size).
+    :param count: The number of features.
+    :return: uint32 array of shape (count,) or (batch, count).
+    """
+    bufs = np.asarray(bufs, dtype=np.uint8)
+    g = bufs[..., feature_indices(bufs.shape[-1], count)].astype(np.uint32)
+    return g[..., 0] ^ (g[..., 1] << 8) ^ (g[..., 2] << 16) ^ (g[..., 3] << 24)
+
+class ByteSample(Sample):
     def __init__(self, buf: bytes, out: int):
-        self.buf = buf
+        # Snapshot of mutable buffers, the parity and fingerprint are memoized
+        self.buf = buf if isinstance(buf, bytes) else bytes(buf)
         self.out = out
 
     def feature(self, n: int) -> int:
-        ret = 0
-        for j in range(4):
-            index = Hash.hash(n, j, len(self.buf))
-            byte_val = self.buf[index]
-            ret ^= (byte_val << (8 * j))
-        return ret
+        return byte_feature(self.buf, n)
+
+    def features(self, count: int) -> np.ndarray:
+        return gather_features(buffer_array(self.buf), count)
 
     def parity(self) -> int:
         return 0
 
+    def fingerprint(self):
+        return (type(self), buffer_digest(self.buf))
+
     def output(self) -> int:
         return self.out
 
-class BalancedByteSample:
+class BalancedByteSample(Sample):
     def __init__(self, buf: bytes, out: int):
-        self.buf = buf
+        self.buf = buf if isinstance(buf, bytes) else bytes(buf)
         self.out = out
 
     def feature(self, n: int) -> int:
-        ret = 0
-        for j in range(4):
-            index = Hash.hash(n, j, len(self.buf))
-            byte_val = self.buf[index]
-            ret ^= (byte_val << (8 * j))
-        return ret
+        return byte_feature(self.buf, n)
+
+    def features(self, count: int) -> np.ndarray:
+        return gather_features(buffer_array(self.buf), count)
 
     def parity(self) -> int:
         ret = 0
@@ -38,5 +88,8 @@ class BalancedByteSample:
             ret = Hash.hash(ret, b, 0xFFFFFFFF)
         return ret & 0xFFFF
 
+    def fingerprint(self):
+        return (type(self), buffer_digest(self.buf))
+
     def output(self) -> int:
         return self.out
@@ -1,24 +1,39 @@
+import numpy as np
 from hashtron.hash.hash import Hash
+from hashtron.net import sample
 
-class Sample:
+def string_features(strs: list[str], count: int) -> np.ndarray:
+    """
+    Compute the first `count` features of many strings at once.
+
+    :param strs: The strings.
+    :param count: The number of features.
+    :return: uint32 array of shape (len(strs), count).
+    """
+    return Hash.string_hash_array(np.arange(count, dtype=np.uint32), strs)
+
+class Sample(sample.Sample):
     def __init__(self, hash: str):
         self.hash = hash
+        self._features = []
 
     def feature(self, n: int) -> int:
-        return Hash.string_hash(n, self.hash)
+        if n >= len(self._features):
+            # Fill the features of the whole layer in one vectorized pass
+            self._features = self.features(max(16, n + 1, 2 * len(self._features))).tolist()
+        return self._features[n]
+
+    def features(self, count: int) -> np.ndarray:
+        return string_features([self.hash], count)[0]
 
     def parity(self) -> int:
         return 0
 
+    def fingerprint(self):
+        return (type(self), self.hash)
 
-class BalancedSample:
-    def __init__(self, hash: str):
-        self.hash = hash
-
-    def feature(self, n: int) -> int:
-        return Hash.string_hash(n, self.hash)
 
+class BalancedSample(Sample):
     def parity(self) -> int:
         return Hash.string_hash(0xffffffff, self.hash)
 
-
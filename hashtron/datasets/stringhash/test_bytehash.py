@@ -0,0 +1,46 @@
+import unittest
+import random
+import numpy as np
+from hashtron.hash.hash import Hash
+from hashtron.datasets.stringhash.bytehash import ByteSample, BalancedByteSample, feature_indices, gather_features
+
+class TestByteHash(unittest.TestCase):
+    def test_feature(self):
+        rng = random.Random(0)
+        buf = bytes(rng.randint(0, 255) for _ in range(169))
+        sample = ByteSample(buf, 0)
+        for n in range(300):
+            expected = 0
+            for j in range(4):
+                expected ^= buf[Hash.hash(n, j, len(buf))] << (8 * j)
+            self.assertEqual(sample.feature(n), expected)
+
+    def test_gather_features(self):
+        rng = np.random.default_rng(0)
+        bufs = rng.integers(0, 256, size=(10, 784), dtype=np.uint8)
+        expected = [[ByteSample(bytes(buf), 0).feature(n) for n in range(100)] for buf in bufs]
+        self.assertEqual(gather_features(bufs, 100).tolist(), expected)
+        self.assertEqual(gather_features(bufs[3], 100).tolist(), expected[3])
+        # Tables are shared per buffer size
+        self.assertIs(feature_indices(784, 10).base, feature_indices(784, 20).base)
+
+    def test_features(self):
+        rng = random.Random(1)
+        buf = bytes(rng.randint(0, 255) for _ in range(169))
+        for sample in (ByteSample(buf, 0), BalancedByteSample(bytearray(buf), 0)):
+            self.assertEqual(sample.features(50).tolist(), [sample.feature(n) for n in range(50)])
+
+    def test_snapshot(self):
+        # Mutating the buffer after creation doesn't change the memoized values
+        buf = bytearray(range(100))
+        sample = BalancedByteSample(buf, 0)
+        parity, fingerprint = sample.parity(), sample.fingerprint()
+        buf[0] ^= 1
+        self.assertEqual(sample.parity(), parity)
+        self.assertEqual(sample.fingerprint(), fingerprint)
+        self.assertEqual(sample.feature(7), BalancedByteSample(bytes(range(100)), 0).feature(7))
+        self.assertNotEqual(BalancedByteSample(buf, 0).fingerprint(), fingerprint)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,5 @@
 from hashtron.datasets.stringhash.stringhash import Sample, BalancedSample
+from hashtron.net import sample
 import unittest
 
 class TestStringHash(unittest.TestCase):
@@ -9,5 +10,37 @@ class TestStringHash(unittest.TestCase):
         self.assertEqual(BalancedSample("world").feature(0), 478492469)
         self.assertEqual(BalancedSample("world").parity(), 1887138210)
 
+    def test_memoized_parity(self):
+        balanced = BalancedSample("world")
+        self.assertEqual(balanced.parity(), 1887138210)
+        self.assertEqual(balanced._memo['parity'], 1887138210)
+
+        # Custom samples get their parity memoized too
+        class Custom(sample.Sample):
+            calls = 0
+
+            def feature(self, n):
+                return n
+
+            def parity(self):
+                Custom.calls += 1
+                return 7
+
+        custom = Custom()
+        self.assertEqual([custom.parity() for _ in range(3)], [7, 7, 7])
+        self.assertEqual(Custom.calls, 1)
+
+        # Samples over a changing buffer opt out
+        class Volatile(Custom):
+            memoize = False
+
+        volatile = Volatile()
+        self.assertEqual([volatile.parity() for _ in range(3)], [7, 7, 7])
+        self.assertEqual(Custom.calls, 4)
+
+    def test_abstract(self):
+        with self.assertRaises(TypeError):
+            sample.Sample()
+
 if __name__ == '__main__':
     unittest.main()
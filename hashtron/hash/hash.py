@@ -1,3 +1,5 @@
+import numpy as np
+
 class Hash:
     @staticmethod
     def hash(n: int, s: int, max_val: int) -> int:
@@ -18,6 +20,50 @@ class Hash:
         # Modular stage using Lemire's fast alternative to modulo reduction
         return ((m * max_val) >> 32) & 0xFFFFFFFF
 
+    @staticmethod
+    def hash_array(n, s, max_val) -> np.ndarray:
+        """
+        Vectorized form of `hash`, broadcasting over arrays of inputs, salts and moduli.
+
+        Inputs and salts are reduced to uint32 (like Go's uint32). Moduli are
+        integers of any sign, like the cumulative moduli of a program, the
+        result is a uint32 array bit-for-bit equal to calling `hash` element
+        by element.
+
+        :param n: Input values (scalar or array-like).
+        :param s: Salts (scalar or array-like).
+        :param max_val: Moduli (scalar or array-like).
+        :return: Hashed values, in range [0, max_val) for moduli in [0, 2^32).
+        """
+        n = np.asarray(n).astype(np.uint32, copy=False)
+        s = np.asarray(s).astype(np.uint32, copy=False)
+        max_val = np.asarray(max_val)
+        if max_val.dtype.kind not in 'iub':
+            # Python ints beyond 64 bits, only their value modulo 2^64 matters
+            max_val = np.asarray(np.asarray(max_val, dtype=object) % (1 << 64))
+        # Two's complement, negative moduli wrap around like in `hash`
+        max_val = max_val.astype(np.uint64)
+        # uint32 arithmetic wraps around, which replaces the explicit masking
+        m = n - s
+        m ^= m << np.uint32(2)
+        m ^= m << np.uint32(3)
+        m ^= m >> np.uint32(5)
+        m ^= m >> np.uint32(7)
+        m ^= m << np.uint32(11)
+        m ^= m << np.uint32(13)
+        m ^= m >> np.uint32(17)
+        m ^= m << np.uint32(19)
+        m += s
+        m = m.astype(np.uint64)
+        # With max_val = hi * 2^32 + lo: (m * max_val) >> 32 == m * hi + ((m * lo) >> 32),
+        # of which only the low 32 bits are kept
+        lo = max_val & np.uint64(0xFFFFFFFF)
+        hi = max_val >> np.uint64(32)
+        out = (m * lo) >> np.uint64(32)
+        if hi.any():
+            out = out + m * hi
+        return out.astype(np.uint32)
+
     @staticmethod
     def strings_hash(in_val: int, strs: list[str]) -> int:
         out = in_val
@@ -31,3 +77,37 @@ class Hash:
         for c in s:
             out = Hash.hash(out, ord(c), 0xFFFFFFFF)
         return out
+
+    @staticmethod
+    def string_hash_array(in_val, strs: list[str]) -> np.ndarray:
+        """
+        Vectorized form of `string_hash` over many strings and many seeds.
+
+        The strings are hashed one character position at a time for all of
+        them at once, strings shorter than the current position are left as is.
+
+        :param in_val: The seeds (scalar or array-like).
+        :param strs: The strings.
+        :return: uint32 array of shape (len(strs), len(in_val)), the string
+            hash of every string with every seed.
+        """
+        seeds = np.asarray(in_val).astype(np.uint32, copy=False).reshape(-1)
+        lengths = np.array([len(s) for s in strs], dtype=np.intp)
+        out = np.empty((len(strs), len(seeds)), dtype=np.uint32)
+        out[:] = seeds
+        if not strs:
+            return out
+        # Longest strings first, so the strings still being hashed are a prefix
+        order = np.argsort(-lengths, kind='stable')
+        lengths = lengths[order]
+        chars = np.zeros((len(strs), lengths[0]), dtype=np.uint32)
+        for row, i in enumerate(order.tolist()):
+            chars[row, :lengths[row]] = np.frombuffer(strs[i].encode('utf-32-le', 'surrogatepass'), dtype='<u4')
+        active = len(strs)
+        sorted_out = out[order]
+        for pos in range(lengths[0]):
+            while lengths[active - 1] <= pos:
+                active -= 1
+            sorted_out[:active] = Hash.hash_array(sorted_out[:active], chars[:active, pos, None], 0xFFFFFFFF)
+        out[order] = sorted_out
+        return out
@@ -1,4 +1,5 @@
 import unittest
+import random
 from hashtron.hash.hash import Hash
 
 class TestHash(unittest.TestCase):
@@ -7,10 +8,41 @@ class TestHash(unittest.TestCase):
         self.assertEqual(Hash.hash(0, 0, 0), 0)
         self.assertLess(Hash.hash(1, 1, 10), 10)
 
+    def test_hash_array(self):
+        # Vectorized hash must match the scalar hash bit for bit
+        rng = random.Random(0)
+        n = [rng.randint(0, 0xFFFFFFFF) for _ in range(1000)]
+        s = [rng.randint(0, 0xFFFFFFFF) for _ in range(1000)]
+        max_val = [rng.randint(0, 0xFFFFFFFF) for _ in range(1000)]
+        expected = [Hash.hash(a, b, c) for a, b, c in zip(n, s, max_val)]
+        self.assertEqual(Hash.hash_array(n, s, max_val).tolist(), expected)
+        # Broadcasting of scalar salt and modulus
+        expected = [Hash.hash(a, 7, 1 << 10) for a in n]
+        self.assertEqual(Hash.hash_array(n, 7, 1 << 10).tolist(), expected)
+
+    def test_hash_array_moduli(self):
+        # Cumulative moduli m0 - m1 - ... can be negative or exceed 32 bits
+        rng = random.Random(1)
+        n = [rng.randint(0, 0xFFFFFFFF) for _ in range(1000)]
+        for max_val in (-7, -1, -(1 << 31), 1 << 32, (1 << 40) + 3, -(1 << 63), 1 << 70):
+            expected = [Hash.hash(a, 5, max_val) for a in n]
+            self.assertEqual(Hash.hash_array(n, 5, max_val).tolist(), expected)
+        moduli = [rng.randint(-(1 << 40), 1 << 40) for _ in range(1000)]
+        expected = [Hash.hash(a, 5, c) for a, c in zip(n, moduli)]
+        self.assertEqual(Hash.hash_array(n, 5, moduli).tolist(), expected)
+
     def test_string_hash(self):
         # Test cases for string_hash function
         self.assertEqual(Hash.string_hash(0, "test"), Hash.string_hash(0, "test"))
 
+    def test_string_hash_array(self):
+        # Ragged strings, including empty and non ASCII ones
+        strs = ["hello", "", "world!", "a", "žluťoučký kůň", "test"]
+        seeds = [0, 1, 0xffffffff, 12345]
+        expected = [[Hash.string_hash(seed, s) for seed in seeds] for s in strs]
+        self.assertEqual(Hash.string_hash_array(seeds, strs).tolist(), expected)
+        self.assertEqual(Hash.string_hash_array(seeds, []).shape, (0, 4))
+
     def test_loop_length(self):
         # Loop length test
         bound1 = 10
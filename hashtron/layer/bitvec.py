@@ -0,0 +1,63 @@
+try:
+    _popcount = int.bit_count
+except AttributeError:
+    # Python < 3.10
+    def _popcount(x: int) -> int:
+        return bin(x).count('1')
+
+
+class BitVector:
+    def __init__(self, size: int):
+        """
+        Fixed size vector of booleans packed into a bytearray.
+
+        Bit n is stored in byte n >> 3, most significant bit first, so that a
+        range of bits reads as a big-endian integer with bit `start` on top.
+
+        :param size: The number of booleans in the vector.
+        """
+        self.size = size
+        self.buf = bytearray((size + 7) >> 3)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, n: int) -> bool:
+        if not 0 <= n < self.size:
+            raise IndexError("bit vector index out of range")
+        return (self.buf[n >> 3] >> (7 - (n & 7))) & 1 != 0
+
+    def __setitem__(self, n: int, v: bool) -> None:
+        if not 0 <= n < self.size:
+            raise IndexError("bit vector index out of range")
+        if v:
+            self.buf[n >> 3] |= 0x80 >> (n & 7)
+        else:
+            self.buf[n >> 3] &= ~(0x80 >> (n & 7)) & 0xFF
+
+    def bits(self, start: int, end: int) -> int:
+        """
+        Pack the bits in [start, end) into an integer, bit `start` being the most significant.
+
+        :param start: The first bit.
+        :param end: One past the last bit.
+        :return: The packed bits.
+        """
+        if start < 0 or end > self.size:
+            raise IndexError("bit vector index out of range")
+        if end <= start:
+            return 0
+        a = start >> 3
+        b = (end + 7) >> 3
+        o = int.from_bytes(self.buf[a:b], 'big') >> ((b << 3) - end)
+        return o & ((1 << (end - start)) - 1)
+
+    def count(self, start: int, end: int) -> int:
+        """
+        Count the set bits in [start, end).
+
+        :param start: The first bit.
+        :param end: One past the last bit.
+        :return: The number of True values in the range.
+        """
+        return _popcount(self.bits(start, end))
@@ -1,4 +1,5 @@
 from typing import List
+from hashtron.layer.bitvec import BitVector
 
 class Full:
     def __init__(self, vec: List[bool], bits: int, maxbits: int):
@@ -47,3 +48,26 @@ class Full:
         
         # Truncate to 32-bit unsigned integer (Go's uint32)
         return o & 0xFFFFFFFF
+
+
+class PackedFull(Full):
+    def __init__(self, vec: BitVector, bits: int, maxbits: int):
+        """
+        Combiner for the fully connected layer backed by a packed bit vector.
+
+        Produces the same features as `Full`, extracting them as bit slices.
+
+        Args:
+            vec (BitVector): Packed vector storing layer state.
+            bits (int): Number of bits per feature.
+            maxbits (int): Maximum bits to read for a feature.
+        """
+        super().__init__(vec, bits, maxbits)
+
+    def feature(self, m: int) -> int:
+        """Compute the m-th feature by slicing `maxbits` bits from the vector."""
+        start = m * self.bits
+        end = start + self.maxbits
+        if end > len(self.vec):
+            return 0
+        return self.vec.bits(start, end) & 0xFFFFFFFF
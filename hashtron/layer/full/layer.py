@@ -1,7 +1,9 @@
-from .combiner import Full
+import numpy as np
+from .combiner import Full, PackedFull
+from hashtron.layer.bitvec import BitVector
 
 class FullLayer:
-    def __init__(self, size: int, bits: int, maxbits: int):
+    def __init__(self, size: int, bits: int, maxbits: int, packed: bool = False):
         """
         Fully connected layer configuration.
         
@@ -9,12 +11,43 @@ class FullLayer:
             size (int): Total size of the boolean vector.
             bits (int): Number of bits per feature.
             maxbits (int): Maximum bits to read per feature.
+            packed (bool): Back the combiners by a packed bit vector.
         """
         self.size = size
         self.bits = bits
         self.maxbits = maxbits
+        self.packed = packed
 
     def lay(self) -> Full:
         """Create a Full combiner instance with initialized boolean vector."""
+        if self.packed:
+            return PackedFull(BitVector(self.size), self.bits, self.maxbits)
         vec = [False] * self.size
         return Full(vec, self.bits, self.maxbits)
+
+    def features_batch(self, bits: np.ndarray, count: int) -> np.ndarray:
+        """
+        Compute the first `count` features for a batch of layer states.
+
+        Equivalent to putting each row of `bits` into a fresh combiner from `lay`
+        and reading features 0..count-1 from it.
+
+        Args:
+            bits (np.ndarray): Boolean array of shape (batch, n) with the cell outputs.
+            count (int): Number of features to compute.
+
+        Returns:
+            np.ndarray: uint32 array of shape (batch, count).
+        """
+        vec = np.zeros((bits.shape[0], self.size), dtype=np.uint32)
+        vec[:, :bits.shape[1]] = bits
+        out = np.zeros((bits.shape[0], count), dtype=np.uint32)
+        # Only the last 32 bits of a feature survive the uint32 truncation
+        width = min(self.maxbits, 32)
+        shifts = np.arange(width - 1, -1, -1, dtype=np.uint32)
+        for m in range(count):
+            end = m * self.bits + self.maxbits
+            if end > self.size:
+                continue
+            out[:, m] = (vec[:, end - width:end] << shifts).sum(axis=1, dtype=np.uint32)
+        return out
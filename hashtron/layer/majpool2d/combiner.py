@@ -1,5 +1,35 @@
+from hashtron.layer.bitvec import BitVector
+
+def feature_offsets(m: int, width, height, subwidth, subheight, capwidth, capheight) -> tuple:
+    """
+    Compute where the m-th feature reads its votes from.
+
+    The feature reads capwidth * capheight submatrices, each one being the
+    subwidth * subheight consecutive values starting at the returned offset.
+
+    :param m: The index of the feature.
+    :return: Start offsets of the submatrices, most significant feature bit first.
+    """
+    supermatrix = width * height
+    submatrix = subwidth * subheight
+    matrix = supermatrix * submatrix
+    base = (m // matrix) * matrix
+    m %= matrix
+    m //= submatrix
+    starty = ((m) // width) * capheight
+    startx = ((m) % width) * capwidth
+    offsets = []
+
+    for y in range(capheight):
+        for x in range(capwidth):
+            xx = (x + startx) % width
+            yy = (y + starty) % height
+            offsets.append(base + submatrix * (width * yy + xx))
+
+    return tuple(offsets)
+
 class MajPool2D:
-    def __init__(self, vec, width, height, subwidth, subheight, capwidth, capheight, repeat, bias):
+    def __init__(self, vec, width, height, subwidth, subheight, capwidth, capheight, repeat, bias, offsets=None):
         """
         Initialize the MajPool2D combiner.
 
@@ -12,6 +42,7 @@ class MajPool2D:
         :param capheight: The height of the capture area.
         :param repeat: The number of repetitions.
         :param bias: The bias value for majority pooling.
+        :param offsets: Optional cached `feature_offsets`, called with the feature index only.
         """
         self.vec = vec
         self.width = width
@@ -22,6 +53,18 @@ class MajPool2D:
         self.capheight = capheight
         self.repeat = repeat
         self.bias = bias
+        self.offsets = offsets
+
+    def feature_offsets(self, m: int) -> tuple:
+        """
+        Get the start offsets of the submatrices the m-th feature reads.
+
+        :param m: The index of the feature.
+        :return: Start offsets of the submatrices.
+        """
+        if self.offsets is not None:
+            return self.offsets(m)
+        return feature_offsets(m, self.width, self.height, self.subwidth, self.subheight, self.capwidth, self.capheight)
 
     def put(self, n: int, v: bool) -> None:
         """
@@ -70,30 +113,76 @@ class MajPool2D:
         :param m: The index of the feature to compute.
         :return: The computed feature as an integer.
         """
-        supermatrix = self.width * self.height
         submatrix = self.subwidth * self.subheight
-        matrix = supermatrix * submatrix
-        base = (m // matrix) * matrix
-        m %= matrix
-        m //= submatrix
-        starty = ((m) // self.width) * self.capheight
-        startx = ((m) % self.width) * self.capwidth
         o = 0
 
-        for y in range(self.capheight):
-            for x in range(self.capwidth):
-                xx = (x + startx) % self.width
-                yy = (y + starty) % self.height
-                w = 0
-
-                for m in range(submatrix):
-                    if self.vec[base + submatrix * (self.width * yy + xx) + m]:
-                        w += 1
-                    else:
-                        w -= 1
-
-                o <<= 1
-                if w > self.bias:
-                    o |= 1
+        for start in self.feature_offsets(m):
+            w = 0
+
+            for n in range(start, start + submatrix):
+                if self.vec[n]:
+                    w += 1
+                else:
+                    w -= 1
+
+            o <<= 1
+            if w > self.bias:
+                o |= 1
+
+        return o
+
+
+class PackedMajPool2D(MajPool2D):
+    def __init__(self, vec: BitVector, width, height, subwidth, subheight, capwidth, capheight, repeat, bias, offsets=None):
+        """
+        Initialize the MajPool2D combiner backed by a packed bit vector.
+
+        Produces the same results as `MajPool2D`, counting the votes of a
+        submatrix with a single popcount.
+
+        :param vec: The packed vector of boolean values.
+        :param width: The width of the pooling matrix.
+        :param height: The height of the pooling matrix.
+        :param subwidth: The width of the submatrix.
+        :param subheight: The height of the submatrix.
+        :param capwidth: The width of the capture area.
+        :param capheight: The height of the capture area.
+        :param repeat: The number of repetitions.
+        :param bias: The bias value for majority pooling.
+        :param offsets: Optional cached `feature_offsets`, called with the feature index only.
+        """
+        super().__init__(vec, width, height, subwidth, subheight, capwidth, capheight, repeat, bias, offsets)
+
+    def disregard(self, n: int) -> bool:
+        """
+        Check if setting the n-th boolean value to False would not affect any feature output.
+
+        :param n: The index of the boolean value to check.
+        :return: True if setting the value to False would not affect the output, False otherwise.
+        """
+        submatrix = self.subwidth * self.subheight
+        start = (n // submatrix) * submatrix
+        # Votes of the other cells, with the n-th cell voting True or False
+        ones = self.vec.count(start, start + submatrix) - self.vec[n]
+        w0 = 2 * (ones + 1) - submatrix
+        w1 = 2 * ones - submatrix
+        return (w0 > self.bias) == (w1 > self.bias)
+
+    def feature(self, m: int) -> int:
+        """
+        Compute the m-th feature from the combiner.
+
+        :param m: The index of the feature to compute.
+        :return: The computed feature as an integer.
+        """
+        submatrix = self.subwidth * self.subheight
+        o = 0
+
+        for start in self.feature_offsets(m):
+            w = 2 * self.vec.count(start, start + submatrix) - submatrix
+
+            o <<= 1
+            if w > self.bias:
+                o |= 1
 
         return o
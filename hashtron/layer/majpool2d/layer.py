@@ -1,8 +1,10 @@
-from hashtron.layer.majpool2d.combiner import MajPool2D
+import numpy as np
+from hashtron.layer.majpool2d.combiner import MajPool2D, PackedMajPool2D, feature_offsets
+from hashtron.layer.bitvec import BitVector
 from hashtron.layer.layer import Layer
 
 class MajPool2DLayer(Layer):
-    def __init__(self, width, height, subwidth, subheight, capwidth, capheight, repeat, bias=0):
+    def __init__(self, width, height, subwidth, subheight, capwidth, capheight, repeat, bias=0, packed=False):
         self.width = width
         self.height = height
         self.subwidth = subwidth
@@ -11,7 +13,61 @@ class MajPool2DLayer(Layer):
         self.capheight = capheight
         self.repeat = repeat
         self.bias = bias
+        self.packed = packed
+        self._offsets = {}
+        self._gather = np.empty((0, capwidth * capheight), dtype=np.intp)
 
     def lay(self) -> MajPool2D:
+        if self.packed:
+            vec = BitVector(self.width * self.height * self.subwidth * self.subheight * self.repeat)
+            return PackedMajPool2D(vec, self.width, self.height, self.subwidth, self.subheight, self.capwidth, self.capheight, self.repeat, self.bias, self.feature_offsets)
         vec = [False] * (self.width * self.height * self.subwidth * self.subheight * self.repeat)
-        return MajPool2D(vec, self.width, self.height, self.subwidth, self.subheight, self.capwidth, self.capheight, self.repeat, self.bias)
+        return MajPool2D(vec, self.width, self.height, self.subwidth, self.subheight, self.capwidth, self.capheight, self.repeat, self.bias, self.feature_offsets)
+
+    def feature_offsets(self, m: int) -> tuple:
+        """
+        Get the start offsets of the submatrices the m-th feature reads, cached per layer.
+
+        :param m: The index of the feature.
+        :return: Start offsets of the submatrices, most significant feature bit first.
+        """
+        offsets = self._offsets.get(m)
+        if offsets is None:
+            offsets = feature_offsets(m, self.width, self.height, self.subwidth, self.subheight, self.capwidth, self.capheight)
+            self._offsets[m] = offsets
+        return offsets
+
+    def gather_map(self, count: int) -> np.ndarray:
+        """
+        Get the submatrix start offsets of the first `count` features as an array, cached per layer.
+
+        :param count: The number of features.
+        :return: Array of shape (count, capwidth * capheight).
+        """
+        if len(self._gather) < count:
+            self._gather = np.array([self.feature_offsets(m) for m in range(count)], dtype=np.intp).reshape(count, -1)
+        return self._gather[:count]
+
+    def features_batch(self, bits: np.ndarray, count: int) -> np.ndarray:
+        """
+        Compute the first `count` features for a batch of layer states.
+
+        Equivalent to putting each row of `bits` into a fresh combiner from `lay`
+        and reading features 0..count-1 from it, truncated to uint32.
+
+        :param bits: Boolean array of shape (batch, n) with the cell outputs.
+        :param count: Number of features to compute.
+        :return: uint32 array of shape (batch, count).
+        """
+        submatrix = self.subwidth * self.subheight
+        matrix = self.width * self.height * submatrix
+        vec = np.zeros((bits.shape[0], matrix * self.repeat), dtype=np.int32)
+        vec[:, :bits.shape[1]] = bits
+        index = self.gather_map(count)[:, :, None] + np.arange(submatrix)
+        # w = ones - zeros = 2 * ones - submatrix, the cell is set when w > bias
+        w = 2 * vec[:, index].sum(axis=3) - submatrix
+        cap = index.shape[1]
+        width = min(cap, 32)
+        shifts = np.arange(width - 1, -1, -1, dtype=np.uint32)
+        set_bits = (w[:, :, cap - width:] > self.bias).astype(np.uint32)
+        return (set_bits << shifts).sum(axis=2, dtype=np.uint32)
@@ -1,5 +1,7 @@
 import unittest
-from hashtron.layer.majpool2d.combiner import MajPool2D
+import random
+from hashtron.layer.majpool2d.combiner import MajPool2D, feature_offsets
+from hashtron.layer.majpool2d.layer import MajPool2DLayer
 
 class TestMajPool2D(unittest.TestCase):
     def test_put(self):
@@ -18,5 +20,30 @@ class TestMajPool2D(unittest.TestCase):
         combiner = MajPool2D(vec, 10, 10, 2, 2, 5, 5, 1, 0)
         self.assertEqual(combiner.feature(0), 33554431)  # Example expected output
 
+    def test_packed(self):
+        # Packed combiners must match the list backed ones
+        rng = random.Random(0)
+        for bias in (-1, 0, 1, 2):
+            layer = MajPool2DLayer(6, 3, 3, 2, 2, 2, 2, bias)
+            packed = MajPool2DLayer(6, 3, 3, 2, 2, 2, 2, bias, packed=True)
+            a, b = layer.lay(), packed.lay()
+            for n in range(len(a.vec)):
+                v = rng.random() < 0.5
+                a.put(n, v)
+                b.put(n, v)
+            for n in range(len(a.vec)):
+                self.assertEqual(a.disregard(n), b.disregard(n))
+            for m in range(len(a.vec)):
+                self.assertEqual(a.feature(m), b.feature(m))
+
+    def test_gather_map(self):
+        layer = MajPool2DLayer(6, 3, 3, 2, 2, 2, 2)
+        expected = [feature_offsets(m, 6, 3, 3, 2, 2, 2) for m in range(144)]
+        self.assertEqual([layer.feature_offsets(m) for m in range(144)], expected)
+        self.assertEqual(layer.gather_map(144).tolist(), [list(o) for o in expected])
+        # Every combiner of the layer reads the layer's cached map
+        self.assertEqual(layer.lay().offsets, layer.feature_offsets)
+
+
 if __name__ == '__main__':
     unittest.main()
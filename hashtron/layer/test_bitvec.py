@@ -0,0 +1,36 @@
+import unittest
+import random
+from hashtron.layer.bitvec import BitVector
+from hashtron.layer.full.layer import FullLayer
+
+class TestBitVector(unittest.TestCase):
+    def test_bits(self):
+        rng = random.Random(0)
+        ref = [rng.random() < 0.5 for _ in range(100)]
+        vec = BitVector(100)
+        for n, v in enumerate(ref):
+            vec[n] = v
+        self.assertEqual([vec[n] for n in range(100)], ref)
+        for _ in range(200):
+            start = rng.randint(0, 100)
+            end = rng.randint(start, 100)
+            self.assertEqual(vec.bits(start, end), int('0' + ''.join('1' if v else '0' for v in ref[start:end]), 2))
+            self.assertEqual(vec.count(start, end), sum(ref[start:end]))
+        with self.assertRaises(IndexError):
+            vec.bits(90, 101)
+
+    def test_full(self):
+        # Packed combiners must match the list backed ones
+        rng = random.Random(1)
+        for bits, maxbits in ((1, 1), (3, 5), (8, 40)):
+            a = FullLayer(100, bits, maxbits).lay()
+            b = FullLayer(100, bits, maxbits, packed=True).lay()
+            for n in range(100):
+                v = rng.random() < 0.5
+                a.put(n, v)
+                b.put(n, v)
+            for m in range(100):
+                self.assertEqual(a.feature(m), b.feature(m))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import threading
+from collections import OrderedDict
+
+class InferenceCache:
+    def __init__(self, maxsize: int = 4096):
+        """
+        Bounded cache of network outputs, evicting the least recently used.
+
+        Keys are sample fingerprints, see `Sample.fingerprint`. Safe to share
+        between threads, every operation holds a lock.
+
+        :param maxsize: Maximum number of cached outputs.
+        """
+        if maxsize <= 0:
+            raise ValueError("cache size must be positive")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Get the cached output for a fingerprint, None when missing.
+        """
+        with self._lock:
+            val = self._data.get(key)
+            if val is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return val
+
+    def put(self, key, val: int) -> None:
+        with self._lock:
+            self._data[key] = val
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Drop all the outputs, the counters are kept.
+        """
+        with self._lock:
+            self._data.clear()
+
+    def info(self) -> dict:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._data), 'maxsize': self.maxsize}
+
+    def __len__(self) -> int:
+        return len(self._data)
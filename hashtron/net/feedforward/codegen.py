@@ -0,0 +1,176 @@
+"""
+Generate a specialized Python module evaluating one network with fixed weights.
+
+The generated `infer` is straight-line code: the hashtron programs, salts and
+moduli are inlined as constants, the combiner features are sums over the
+baked in cell indices and there is no per call branching on the layer kinds.
+Layers with a compiled truth table, see `FeedforwardNetwork.compile_tables`,
+embed the table and look the cells up instead of hashing. The outputs are
+the same as `FeedforwardNetwork.infer`.
+
+    infer = compile_infer(net.network)
+    infer(sample)
+"""
+
+import hashlib
+import importlib.util
+import os
+import tempfile
+from hashtron.layer.full.layer import FullLayer
+from hashtron.layer.majpool2d.layer import MajPool2DLayer
+
+HEADER = '''# Generated by hashtron.net.feedforward.codegen, do not edit
+from hashtron.hash.hash import Hash
+from hashtron.net.feedforward.feedforward_network import FeedforwardNetwork
+
+_wrap = FeedforwardNetwork._wrap
+_bulk_features = FeedforwardNetwork._bulk_features
+
+def _features(in_val, count):
+    feats = _bulk_features(in_val, count)
+    if feats is None:
+        feats = [in_val.feature(i) for i in range(count)]
+    return feats
+'''
+
+def _cell(lines: list, name: str, tron, inp: str, premodulo: int, salt: int, bits: int) -> None:
+    """
+    Emit the statements computing the output of one hashtron into `name`.
+    """
+    if premodulo != 0:
+        lines.append(f'    v = H({inp}, {salt}, {premodulo})')
+        inp = 'v'
+    salts, moduli = tron.stages()
+    if not salts:
+        lines.append(f'    {name} = 0')
+        return
+    terms = []
+    for j in range(bits):
+        lines.append(f'    u = {inp}' if bits <= 1 else f'    u = {inp} | {j << 16}')
+        for s, m in zip(salts, moduli):
+            lines.append(f'    u = H(u, {s}, {m})')
+        if bits <= 1:
+            lines.append(f'    {name} = u & 1')
+            return
+        lines.append(f'    u{j} = u & 1')
+        terms.append(f'(u{j} << {j})')
+    lines.append(f'    {name} = {" | ".join(terms)}')
+
+def _majpool_features(layer: MajPool2DLayer, cells: int, count: int) -> list:
+    """
+    Expressions of the first `count` features of a MajPool2D combiner over cells c0..c{cells-1}.
+    """
+    submatrix = layer.subwidth * layer.subheight
+    # 2 * ones - submatrix > bias, for an integer number of ones
+    threshold = (layer.bias + submatrix) // 2
+    out = []
+    for m in range(count):
+        offsets = layer.feature_offsets(m)
+        terms = []
+        for k, start in enumerate(offsets):
+            ones = [f'c{n}' for n in range(start, start + submatrix) if n < cells]
+            votes = ' + '.join(ones) if ones else '0'
+            terms.append(f'(({votes}) > {threshold}) << {len(offsets) - 1 - k}')
+        out.append(' | '.join(terms) if terms else '0')
+    return out
+
+def _full_features(layer: FullLayer, cells: int, count: int) -> list:
+    """
+    Expressions of the first `count` features of a Full combiner over cells c0..c{cells-1}.
+    """
+    out = []
+    for m in range(count):
+        start = m * layer.bits
+        end = start + layer.maxbits
+        if end > layer.size:
+            out.append('0')
+            continue
+        # Bits shifted out of the uint32 feature are dropped
+        terms = [f'(c{pos} << {end - 1 - pos})' for pos in range(start, end) if pos < cells and end - 1 - pos < 32]
+        out.append(' | '.join(terms) if terms else '0')
+    return out
+
+def generate(network) -> str:
+    """
+    Generate the source of a module with an `infer(in_val) -> int` function for the network.
+
+    :param network: The `FeedforwardNetwork`, with its weights loaded.
+    :return: The Python source.
+    :raises ValueError: If the network uses a combiner other than MajPool2D or Full.
+    """
+    layers = network.len_layers()
+    last_reads = min(16, network.get_last_cells())
+    lines = ['', 'def infer(in_val, H=Hash.hash):', '    in_val = _wrap(in_val)']
+    tables = []
+    first = True
+    for l in range(0, layers, 2):
+        cells = network.layers[l]
+        combiner = network.combiners[l + 1] if layers > l + 1 else None
+        # Features the next layer, or the final output, reads from this layer
+        reads = network.output_reads(l)
+        if combiner is not None:
+            if first:
+                lines.append(f'    x = _features(in_val, {len(cells)})')
+            lines.append(f'    # layer {l}: {len(cells)} cells, {type(combiner).__name__} combiner')
+            table = network.tables[l]
+            if table is not None:
+                tables.append(f'T{l} = {table.data!r}')
+            for i, tron in enumerate(cells):
+                if table is not None:
+                    lines.append(f'    v = H(x[{i}], {i}, {network.premodulo[l]})')
+                    lines.append(f'    c{i} = (T{l}[{i * table.stride} + (v >> 3)] >> (v & 7)) & 1')
+                else:
+                    _cell(lines, f'c{i}', tron, f'x[{i}]', network.premodulo[l], i, 1)
+            if isinstance(combiner, MajPool2DLayer):
+                feats = _majpool_features(combiner, len(cells), reads)
+            elif isinstance(combiner, FullLayer):
+                feats = _full_features(combiner, len(cells), reads)
+            else:
+                raise ValueError(f"can't generate code for the {type(combiner).__name__} combiner")
+            lines.append('    x = [')
+            lines.extend(f'        {f},' for f in feats)
+            lines.append('    ]')
+        else:
+            if first:
+                lines.append('    x = _features(in_val, 1)')
+            lines.append(f'    # layer {l}: single cell')
+            bits = cells[0].bits if network.mapping[l] > 0 else 1
+            _cell(lines, 'c0', cells[0], 'x[0]', network.premodulo[l], 0, bits)
+            lines.append(f'    x = [c0] * {reads}')
+        first = False
+    if first:
+        lines.append(f'    x = _features(in_val, {last_reads})')
+    terms = [f'(x[{j}] << {j})' for j in range(last_reads)]
+    lines.append(f'    return ({" | ".join(terms) if terms else "0"}) ^ in_val.parity()')
+    return HEADER + ''.join(f'\n{t}\n' for t in tables) + '\n'.join(lines) + '\n'
+
+def write_module(network, file_name: str) -> None:
+    """
+    Write the generated module of the network to a file.
+    """
+    with open(file_name, 'w') as f:
+        f.write(generate(network))
+
+def load_module(file_name: str):
+    """
+    Import a generated module from a file.
+
+    :return: The module, its `infer` is a drop-in for `FeedforwardNetwork.infer`.
+    """
+    with open(file_name, 'rb') as f:
+        digest = hashlib.blake2b(f.read(), digest_size=8).hexdigest()
+    spec = importlib.util.spec_from_file_location(f'hashtron_generated_{digest}', file_name)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def compile_infer(network):
+    """
+    Generate, import and return the specialized `infer` of the network.
+
+    Generate the module again after the weights change.
+    """
+    with tempfile.TemporaryDirectory() as d:
+        file_name = os.path.join(d, 'generated_net.py')
+        write_module(network, file_name)
+        return load_module(file_name).infer
@@ -1,8 +1,18 @@
+import time
+import numpy as np
 from hashtron.classifier.constructor import Hashtron
 from hashtron.layer.layer import Layer
 from hashtron.hash.hash import Hash
 from hashtron.net.single_value import SingleValue
 from hashtron.net.input import Input
+from hashtron.net.sample import Sample
+from hashtron.net.feedforward.table import TruthTable
+from hashtron.net.feedforward.cache import InferenceCache
+from hashtron.net.feedforward.stats import InferenceStats, LayerStats
+
+def _no_lap(name: str = None) -> float:
+    # Stand-in for `LayerStats.lap` when profiling is off
+    return 0.0
 
 class FeedforwardNetwork:
     def __init__(self, net):
@@ -11,6 +21,10 @@ class FeedforwardNetwork:
         self.mapping = []
         self.combiners = []
         self.premodulo = []
+        self.tables = []
+        self.table_budget = None
+        self.cache = None
+        self.stats = None
 
     def new_layer(self, n: int, bits: int, premodulo: int = 0) -> None:
         layer = [Hashtron.new(None, bits) for _ in range(n)]
@@ -18,12 +32,82 @@ class FeedforwardNetwork:
         self.mapping.append(bits)
         self.combiners.append(None)
         self.premodulo.append(premodulo)
+        self.tables.append(None)
 
     def new_combiner(self, layer: Layer) -> None:
         self.layers.append([])
         self.mapping.append(0)
         self.combiners.append(layer)
         self.premodulo.append(0)
+        self.tables.append(None)
+
+    def compile_tables(self, max_bytes: int = 64 << 20) -> int:
+        """
+        Precompute truth tables for the layers with a bounded input domain.
+
+        Every hashtron of a layer with premodulo set, feeding a combiner, is a
+        function over [0, premodulo) and gets replaced by a packed bit table
+        lookup. Layers whose table would not fit into the remaining budget
+        keep hashing. Call again after changing the weights, loading them
+        through `FeedforwardNetworkIO` does so automatically.
+
+        :param max_bytes: Memory budget for all the tables together.
+        :return: The number of bytes used by the tables.
+        """
+        self.table_budget = max_bytes
+        self.tables = [None] * len(self.layers)
+        used = 0
+        for l in range(len(self.layers)):
+            if self.premodulo[l] == 0 or not (len(self.combiners) > l + 1 and self.combiners[l + 1] is not None):
+                continue
+            size = len(self.layers[l]) * TruthTable.row_size(self.premodulo[l])
+            if used + size > max_bytes:
+                continue
+            self.tables[l] = TruthTable(self.layers[l], self.premodulo[l])
+            used += size
+        return used
+
+    def weights_changed(self) -> None:
+        """
+        Drop the state derived from the weights, called after weights are (re)loaded.
+        """
+        if self.table_budget is not None:
+            self.compile_tables(self.table_budget)
+        if self.cache is not None:
+            self.cache.clear()
+
+    def enable_cache(self, maxsize: int = 4096) -> InferenceCache:
+        """
+        Cache the outputs of `infer` and `infer_batch` by sample fingerprint.
+
+        Inputs without a fingerprint are always evaluated. The cache is cleared
+        when the weights are loaded through `FeedforwardNetworkIO`, call
+        `weights_changed` after changing them in any other way.
+
+        :param maxsize: Maximum number of cached outputs.
+        :return: The cache, holding the hit and miss counters.
+        """
+        self.cache = InferenceCache(maxsize)
+        return self.cache
+
+    def disable_cache(self) -> None:
+        self.cache = None
+
+    def enable_stats(self, callback=None) -> InferenceStats:
+        """
+        Profile every `infer` per layer, see `InferenceStats`.
+
+        Profiling times every feature read, hash and combiner update, which
+        slows inference down. When disabled `infer` runs unchanged.
+
+        :param callback: Called after every inference with its per layer stats and wall time.
+        :return: The stats, accumulated over all the inferences.
+        """
+        self.stats = InferenceStats(callback)
+        return self.stats
+
+    def disable_stats(self) -> None:
+        self.stats = None
 
 
     def len_layers(self) -> int:
@@ -41,22 +125,180 @@ class FeedforwardNetwork:
         :param in_val: The input to the network.
         :return: The output of the network.
         """
-        if (not hasattr(in_val, 'feature') or not callable(in_val.feature)) and in_val is not Input and in_val is not SingleValue:
-            in_val = SingleValue(in_val)
-        if (not hasattr(in_val, 'parity') or not callable(in_val.parity)) and in_val is not Input:
-            in_val = Input(in_val)
+        in_val = self._wrap(in_val)
+        key = None
+        if self.cache is not None:
+            key = self._fingerprint(in_val)
+            if key is not None:
+                val = self.cache.get(key)
+                if val is not None:
+                    return val
+        stats = self.stats
+        if stats is not None:
+            start = time.perf_counter()
+            layers = []
         output = in_val
         for l_prev in range(0, self.len_layers(), 2):
-            output, _ = self.forward(output, l_prev, -1, 0)
+            layer_stats = None
+            if stats is not None:
+                layer_stats = LayerStats(l_prev, len(self.layers[l_prev]))
+                layers.append(layer_stats)
+            output, _ = self.forward(output, l_prev, -1, 0, layer_stats)
         val = 0
+        reads = 0
         for j in range(16):
             if j >= self.get_last_cells():
                 break
             val |= (output.feature(j) << j)
+            reads += 1
+        if stats is not None:
+            stats.add(layers, time.perf_counter() - start, reads)
+
+        val ^= in_val.parity()
+        if key is not None:
+            self.cache.put(key, val)
+        return val
+
+    def infer_batch(self, samples) -> list[int]:
+        """
+        Infer the network output for many inputs at once.
+
+        The network is evaluated layer by layer over the whole batch, the
+        results are the same as calling `infer` on every input.
 
-        return val ^ in_val.parity()
+        :param samples: The inputs to the network.
+        :return: The outputs of the network, in input order.
+        """
+        samples = [self._wrap(s) for s in samples]
+        if not samples:
+            return []
+        if self.cache is not None:
+            return self._infer_batch_cached(samples)
+        return self._evaluate_batch(samples)
+
+    def _evaluate_batch(self, samples) -> list[int]:
+        output = self._sample_features(samples)
+        for l_prev in range(0, self.len_layers(), 2):
+            output = self.forward_batch(output, l_prev)
+        cells = min(16, self.get_last_cells())
+        val = np.zeros(len(samples), dtype=np.uint64)
+        if cells > 0:
+            feats = output(cells).astype(np.uint64)
+            for j in range(cells):
+                val |= feats[:, j] << np.uint64(j)
+        return [v ^ s.parity() for v, s in zip(val.tolist(), samples)]
+
+    def _infer_batch_cached(self, samples) -> list[int]:
+        out = [None] * len(samples)
+        # Fingerprint -> positions of the uncached samples, repeats are evaluated once
+        todo = {}
+        uncached = []
+        for b, s in enumerate(samples):
+            key = self._fingerprint(s)
+            if key is None:
+                uncached.append(b)
+                continue
+            val = self.cache.get(key)
+            if val is not None:
+                out[b] = val
+            elif key in todo:
+                todo[key].append(b)
+            else:
+                todo[key] = [b]
+                uncached.append(b)
+        if uncached:
+            vals = self._evaluate_batch([samples[b] for b in uncached])
+            for b, val in zip(uncached, vals):
+                out[b] = val
+                key = self._fingerprint(samples[b])
+                if key is not None:
+                    self.cache.put(key, val)
+                    for other in todo[key][1:]:
+                        out[other] = val
+        return out
 
-    def forward(self, in_val, l: int, worst: int, neg: int) -> (Input, bool):
+    def forward_batch(self, in_feat, l: int):
+        """
+        Forward pass through the network for a batch of inputs.
+
+        :param in_feat: Callable returning the first `count` input features as a
+            uint32 array of shape (batch, count).
+        :param l: The layer index.
+        :return: Callable of the same kind returning the features of the layer output.
+        """
+        if len(self.combiners) > l + 1 and self.combiners[l + 1] is not None:
+            n = len(self.layers[l])
+            feats = in_feat(n)
+            if self.premodulo[l] != 0:
+                feats = Hash.hash_array(feats, np.arange(n), self.premodulo[l])
+            if self.tables[l] is not None:
+                bits = self.tables[l].bits(feats)
+            else:
+                bits = np.empty(feats.shape, dtype=bool)
+                for i in range(n):
+                    bits[:, i] = (self.layers[l][i].forward.forward_array(feats[:, i], False) & 1) != 0
+            layer = self.combiners[l + 1]
+            return lambda count: self._combiner_features(layer, bits, count)
+        feat = in_feat(1)[:, 0]
+        if self.premodulo[l] != 0:
+            feat = Hash.hash_array(feat, 0, self.premodulo[l])
+        val = self.layers[l][0].forward.forward_array(feat, False)
+        if not (len(self.mapping) > l and self.mapping[l] > 0):
+            val &= np.uint32(1)
+        return lambda count: np.repeat(val[:, None], count, axis=1)
+
+    @staticmethod
+    def _wrap(in_val):
+        # Samples and plain ints, the common inputs, skip the duck typing checks
+        if isinstance(in_val, Sample):
+            return in_val
+        if type(in_val) is int:
+            return SingleValue(in_val)
+        if (not hasattr(in_val, 'feature') or not callable(in_val.feature)) and in_val is not Input and in_val is not SingleValue:
+            in_val = SingleValue(in_val)
+        if (not hasattr(in_val, 'parity') or not callable(in_val.parity)) and in_val is not Input:
+            in_val = Input(in_val)
+        return in_val
+
+    @staticmethod
+    def _fingerprint(in_val):
+        if hasattr(in_val, 'fingerprint') and callable(in_val.fingerprint):
+            return in_val.fingerprint()
+        return None
+
+    @staticmethod
+    def _bulk_features(in_val, count: int):
+        if hasattr(in_val, 'features') and callable(in_val.features):
+            return np.asarray(in_val.features(count)).tolist()
+        return None
+
+    @staticmethod
+    def _sample_features(samples):
+        def features(count):
+            out = np.empty((len(samples), count), dtype=np.uint32)
+            for b, s in enumerate(samples):
+                if hasattr(s, 'features') and callable(s.features):
+                    out[b] = s.features(count)
+                else:
+                    out[b] = [s.feature(i) & 0xFFFFFFFF for i in range(count)]
+            return out
+        return features
+
+    @staticmethod
+    def _combiner_features(layer, bits, count):
+        if hasattr(layer, 'features_batch'):
+            return layer.features_batch(bits, count)
+        # Generic combiner: evaluate it sample by sample
+        out = np.empty((bits.shape[0], count), dtype=np.uint32)
+        for b, row in enumerate(bits.tolist()):
+            combiner = layer.lay()
+            for i, v in enumerate(row):
+                combiner.put(i, v)
+            for m in range(count):
+                out[b, m] = combiner.feature(m) & 0xFFFFFFFF
+        return out
+
+    def forward(self, in_val, l: int, worst: int, neg: int, stats: LayerStats = None) -> (Input, bool):
         """
         Forward pass through the network.
 
@@ -64,32 +306,83 @@ class FeedforwardNetwork:
         :param l: The layer index.
         :param worst: The index of the worst hashtron.
         :param neg: Whether to negate the worst hashtron's output.
+        :param stats: When given, the time and work of the layer are added to it.
         :return: The intermediate output and a boolean indicating if the worst hashtron's output was computed.
         """
+        # Every stage of the layer is timed by a lap, a no-op without stats
+        lap = stats.lap if stats is not None else _no_lap
+        start = lap()
+        premodulo = self.premodulo[l]
         if len(self.combiners) > l + 1 and self.combiners[l + 1] is not None:
+            trons = self.layers[l]
+            n = len(trons)
+            table = self.tables[l]
+            # Samples providing all their features at once skip the per feature calls
+            feats = self._bulk_features(in_val, n)
+            if feats is None:
+                feats = [in_val.feature(i) for i in range(n)]
+            lap('feature_time')
+            if premodulo != 0:
+                feats = [Hash.hash(feat, i, premodulo) for i, feat in enumerate(feats)]
+            lap('premodulo_time')
+            if table is not None:
+                bits = [table.bit(i, feat) for i, feat in enumerate(feats)]
+                if 0 <= worst < n and neg == 1:
+                    bits[worst] ^= 1
+            else:
+                bits = [trons[i].forward.forward(feat, (i == worst) and (neg == 1)) & 1 for i, feat in enumerate(feats)]
+            lap('hashtron_time')
             combiner = self.combiners[l + 1].lay()
-            computed = False
-
-            for i in range(len(self.layers[l])):
-                feat = in_val.feature(i)
-                if self.premodulo[l] != 0:
-                    feat = Hash.hash(feat, i, self.premodulo[l])
-                bit = self.layers[l][i].forward.forward(feat, (i == worst) and (neg == 1))
-                combiner.put(i, (bit & 1) != 0)
-                if i == worst:
-                    computed = (bit & 1) != 0
+            for i, bit in enumerate(bits):
+                combiner.put(i, bit != 0)
+            lap('combiner_time')
+            computed = 0 <= worst < n and bits[worst] != 0
 
+            if stats is not None:
+                stats.calls += 1
+                stats.wall += lap() - start
+                stats.feature_reads += n
+                stats.cell_evaluations += n
+                stats.combiner_puts += n
+                if premodulo != 0:
+                    stats.hash_calls += n
+                if table is not None:
+                    stats.table_lookups += n
+                else:
+                    stats.hash_calls += sum(tron.bits * len(tron.stages()[0]) for tron in trons)
             return combiner, computed
-        elif len(self.mapping) > l and self.mapping[l] > 0:
-            if self.premodulo[l] != 0:
-                in_val = SingleValue(Hash.hash(in_val.feature(0), 0, self.premodulo[l]))
-            val = self.layers[l][0].forward.forward(in_val.feature(0), (0 == worst) and (neg == 1))
+
+        feat = in_val.feature(0)
+        lap('feature_time')
+        if premodulo != 0:
+            feat = Hash.hash(feat, 0, premodulo)
+        lap('premodulo_time')
+        tron = self.layers[l][0]
+        val = tron.forward.forward(feat, (0 == worst) and (neg == 1))
+        lap('hashtron_time')
+
+        if stats is not None:
+            stats.calls += 1
+            stats.wall += lap() - start
+            stats.feature_reads += 1
+            stats.cell_evaluations += 1
+            stats.hash_calls += (premodulo != 0) + tron.bits * len(tron.stages()[0])
+        if len(self.mapping) > l and self.mapping[l] > 0:
             return SingleValue(val), False
-        else:
-            if self.premodulo[l] != 0:
-                in_val = SingleValue(Hash.hash(in_val.feature(0), 0, self.premodulo[l]))
-            bit = self.layers[l][0].forward.forward(in_val.feature(0), (0 == worst) and (neg == 1))
-            return SingleValue(bit & 1), (bit & 1) != 0
+        return SingleValue(val & 1), (val & 1) != 0
+
+    def output_reads(self, l: int) -> int:
+        """
+        Get the number of features read from the output of layer l.
+
+        :param l: The index of a hashtron layer.
+        :return: The cells of the next layer when it feeds a combiner, 1 when it
+            is a single cell layer, the bits of the final output after the last layer.
+        """
+        layers = self.len_layers()
+        if l + 2 < layers:
+            return len(self.layers[l + 2]) if layers > l + 3 and self.combiners[l + 3] is not None else 1
+        return min(16, self.get_last_cells())
 
     def get_bits(self) -> int:
         if len(self.mapping) == 0:
@@ -0,0 +1,177 @@
+import numpy as np
+from hashtron.hash.hash import Hash
+from hashtron.layer.full.layer import FullLayer
+from hashtron.layer.majpool2d.layer import MajPool2DLayer
+from hashtron.datasets.stringhash.bytehash import byte_feature, feature_indices
+from hashtron.net.sample import buffer_array
+
+def feature_dependencies(layer, cells: int, count: int):
+    """
+    Map every cell put into a combiner to the features reading it.
+
+    :param layer: The combiner layer.
+    :param cells: Number of cells put into the combiner.
+    :param count: Number of features read from the combiner.
+    :return: List holding the feature indices of every cell, None when the
+        combiner is unknown and every feature may read every cell.
+    """
+    deps = [[] for _ in range(cells)]
+    if isinstance(layer, MajPool2DLayer):
+        submatrix = layer.subwidth * layer.subheight
+        for m in range(count):
+            for start in layer.feature_offsets(m):
+                for n in range(start, min(start + submatrix, cells)):
+                    deps[n].append(m)
+    elif isinstance(layer, FullLayer):
+        for m in range(count):
+            start = m * layer.bits
+            end = start + layer.maxbits
+            if end > layer.size:
+                continue
+            for n in range(start, min(end, cells)):
+                deps[n].append(m)
+    else:
+        return None
+    return deps
+
+class _Stage:
+    def __init__(self, network, l: int, reads: int):
+        # One hashtron layer and the combiner after it
+        self.l = l
+        self.cells = network.layers[l]
+        self.premodulo = network.premodulo[l]
+        self.table = network.tables[l]
+        self.layer = network.combiners[l + 1] if network.len_layers() > l + 1 else None
+        self.mapping = network.mapping[l]
+        self.reads = reads
+        if self.layer is not None:
+            self.inputs = len(self.cells)
+            self.deps = feature_dependencies(self.layer, len(self.cells), reads)
+        else:
+            self.inputs = 1
+            self.deps = None
+
+class IncrementalEvaluator:
+    def __init__(self, network):
+        """
+        Stateful evaluator for consecutive byte buffer samples differing in few bytes.
+
+        The activations of the previous sample are kept. Only the first layer
+        cells reading a changed byte are evaluated again, then only the cells
+        reading a changed combiner feature, and so on. The outputs are the
+        same as `FeedforwardNetwork.infer`.
+
+        Samples must have a `buf` whose features are `byte_feature(buf, n)`, like
+        `ByteSample`, `BalancedByteSample` and the MNIST inputs; other samples are
+        evaluated fully by the network. Call `reset` after the weights change.
+
+        :param network: The `FeedforwardNetwork` to evaluate.
+        """
+        self.network = network
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Forget the previous sample and rebuild the dependency maps, the next inference is complete.
+        """
+        network = self.network
+        self.stages = []
+        layers = network.len_layers()
+        for l in range(0, layers, 2):
+            self.stages.append(_Stage(network, l, network.output_reads(l)))
+        self._buf = None
+        self._bits = [None] * len(self.stages)
+        self._combiners = [None] * len(self.stages)
+        self._outputs = [None] * len(self.stages)
+        # Cells evaluated by the last inference
+        self.evaluated = 0
+
+    def infer(self, sample) -> int:
+        """
+        Infer the network output, reusing the activations of the previous sample.
+
+        :param sample: The input to the network.
+        :return: The output of the network.
+        """
+        if not self.stages or not hasattr(sample, 'buf'):
+            self._buf = None
+            self.evaluated = sum(len(stage.cells) for stage in self.stages)
+            return self.network.infer(sample)
+        buf = buffer_array(sample.buf)
+        first = self.stages[0]
+        if self._buf is None or len(self._buf) != len(buf):
+            changed = None
+        else:
+            positions = np.flatnonzero(buf != self._buf)
+            rows = feature_indices(len(buf), first.inputs)
+            changed = np.flatnonzero(np.isin(rows, positions).any(axis=1)).tolist()
+        self._buf = buf.copy()
+        self.evaluated = 0
+
+        inputs = None
+        for k, stage in enumerate(self.stages):
+            if k == 0:
+                idx = range(first.inputs) if changed is None else changed
+                values = {i: byte_feature(sample.buf, i) for i in idx}
+            else:
+                idx = range(stage.inputs) if changed is None else changed
+                values = {i: inputs[i] for i in idx}
+            changed = self._forward(k, stage, values, changed is None)
+            inputs = self._outputs[k]
+
+        val = 0
+        for j, feat in enumerate(inputs[:self.stages[-1].reads]):
+            val |= feat << j
+        return val ^ sample.parity()
+
+    def _cell(self, stage: '_Stage', i: int, feat: int) -> int:
+        self.evaluated += 1
+        if stage.premodulo != 0:
+            feat = Hash.hash(feat, i, stage.premodulo)
+        if stage.layer is None:
+            val = stage.cells[0].forward.forward(feat, False)
+            return val if stage.mapping > 0 else val & 1
+        if stage.table is not None:
+            return stage.table.bit(i, feat)
+        return stage.cells[i].forward.forward(feat, False) & 1
+
+    def _forward(self, k: int, stage: '_Stage', values: dict, full: bool):
+        """
+        Evaluate the cells of a stage with changed inputs, return the changed output features, None for all.
+        """
+        if stage.layer is None:
+            if 0 not in values:
+                return []
+            val = self._cell(stage, 0, values[0])
+            if not full and self._outputs[k][0] == val:
+                return []
+            self._outputs[k] = [val] * stage.reads
+            return None if full else list(range(stage.reads))
+
+        if full:
+            self._bits[k] = [0] * len(stage.cells)
+            self._combiners[k] = stage.layer.lay()
+        bits = self._bits[k]
+        combiner = self._combiners[k]
+        flipped = []
+        for i, feat in values.items():
+            bit = self._cell(stage, i, feat)
+            if full or bit != bits[i]:
+                bits[i] = bit
+                combiner.put(i, bit != 0)
+                flipped.append(i)
+        if full:
+            self._outputs[k] = [combiner.feature(m) for m in range(stage.reads)]
+            return None
+        if stage.deps is None:
+            affected = range(stage.reads) if flipped else ()
+        else:
+            affected = sorted({m for i in flipped for m in stage.deps[i]})
+        outputs = self._outputs[k]
+        changed = []
+        for m in affected:
+            feat = combiner.feature(m)
+            if feat != outputs[m]:
+                outputs[m] = feat
+                changed.append(m)
+        return changed
@@ -1,26 +1,238 @@
+import re
+import sys
 import zlib
-import json
+import mmap
+import numpy as np
+from hashtron.classifier.constructor import Hashtron
+
+# Binary weights file: magic, version, cells, words, then cells + 1 offsets
+# and the program words, all little-endian uint32
+BINARY_MAGIC = b'HTRN'
+BINARY_VERSION = 1
+
+def pack_programs(network) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Pack the programs of all the hashtrons of a network into flat arrays.
+
+    Cells are numbered in layer order, the program of cell i is
+    words[offsets[i]:offsets[i + 1]], a sequence of (salt, modulus) pairs.
+
+    :param network: The FeedforwardNetwork to pack.
+    :return: The uint32 cell offsets and the uint32 program words.
+    """
+    return _pack([cell.program for layer in network.layers for cell in layer])
+
+def _pack(programs: list) -> tuple[np.ndarray, np.ndarray]:
+    offsets = np.zeros(len(programs) + 1, dtype=np.uint32)
+    offsets[1:] = np.cumsum([2 * len(p) for p in programs])
+    words = np.array([v for p in programs for pair in p for v in pair], dtype=np.int64)
+    return offsets, words.astype(np.uint32)
+
+def unpack_programs(network, offsets: np.ndarray, words: np.ndarray) -> bool:
+    """
+    Assign programs packed by `pack_programs` to the hashtrons of a network.
+
+    :param network: The FeedforwardNetwork to load.
+    :param offsets: The cell offsets.
+    :param words: The program words.
+    :return: True if the number of packed programs matches the network.
+    """
+    cells = [cell for layer in network.layers for cell in layer]
+    if len(cells) != len(offsets) - 1:
+        return False
+    offsets = offsets.tolist()
+    for i, cell in enumerate(cells):
+        cell.program = words[offsets[i]:offsets[i + 1]].reshape(-1, 2).tolist()
+    network.weights_changed()
+    return True
+
+def write_binary_weights(file_name: str, offsets: np.ndarray, words: np.ndarray) -> None:
+    """
+    Write packed programs as a binary weights file.
+
+    :param file_name: The file to write.
+    :param offsets: The uint32 cell offsets, see `pack_programs`.
+    :param words: The uint32 program words.
+    """
+    header = np.array([BINARY_VERSION, len(offsets) - 1, len(words)], dtype='<u4')
+    with open(file_name, 'wb') as f:
+        f.write(BINARY_MAGIC)
+        f.write(header.tobytes())
+        f.write(offsets.astype('<u4').tobytes())
+        f.write(words.astype('<u4').tobytes())
+
+def _decompressed_chunks(file_name: str, chunk_size: int):
+    decompressor = zlib.decompressobj()
+    with open(file_name, 'rb') as f:
+        while not decompressor.eof:
+            data = f.read(chunk_size)
+            if not data:
+                raise zlib.error("Error -5 while decompressing data: incomplete or truncated stream")
+            while data:
+                out = decompressor.decompress(data, chunk_size)
+                if out:
+                    yield out
+                data = decompressor.unconsumed_tail
+
+def _chain(head: bytes, chunks):
+    yield head
+    yield from chunks
+
+def _zlib_cells(file_name: str, chunk_size: int):
+    """
+    Stream the JSON texts of the cells of a zlib compressed JSON weights file.
+
+    :return: Generator of the cell texts, None for an empty model.
+    :raises ValueError: If the file doesn't hold a JSON array.
+    """
+    chunks = _decompressed_chunks(file_name, chunk_size)
+    head = b''
+    for chunk in chunks:
+        head += chunk
+        if len(head) > 2:
+            break
+    if len(head) <= 2:
+        # empty model or uknown format
+        chunks.close()
+        return None
+    if head[0] != ord('['):
+        chunks.close()
+        raise ValueError("unknown model format: please fix your model, or update pyclassifier (pip is hashtron) to recognize this model")
+    return _split_cells(head, chunks)
+
+def _split_cells(head: bytes, chunks):
+    stream = _CellStream()
+    try:
+        for chunk in _chain(head, chunks):
+            yield from stream.feed(chunk)
+    finally:
+        chunks.close()
+
+class _CellStream:
+    """
+    Splits the outer JSON array of a weights file into the JSON texts of its cells.
+
+    The cells are arrays of arrays of numbers, so tracking the bracket depth
+    is enough to find where a cell ends.
+    """
+    brackets = re.compile(rb'[\[\]]')
+
+    def __init__(self):
+        self.depth = 0
+        self.pending = []
+
+    def feed(self, chunk: bytes):
+        start = 0 if self.depth >= 2 else None
+        for m in self.brackets.finditer(chunk):
+            if m.group() == b'[':
+                self.depth += 1
+                if self.depth == 2:
+                    start = m.start()
+            else:
+                self.depth -= 1
+                if self.depth < 0:
+                    raise ValueError("malformed model: unbalanced brackets")
+                if self.depth == 1:
+                    self.pending.append(chunk[start:m.end()])
+                    yield b''.join(self.pending)
+                    self.pending = []
+                    start = None
+        if start is not None:
+            self.pending.append(chunk[start:])
+
+def convert_zlib_to_binary(src: str, dst: str, chunk_size: int = 1 << 16) -> int:
+    """
+    Convert a `.json.zlib` weights file into the binary weights format.
+
+    The cells are read with the same streaming parser as
+    `FeedforwardNetworkIO.read_zlib_weights_from_file`.
+
+    :param src: The zlib compressed JSON weights file.
+    :param dst: The binary weights file to write.
+    :param chunk_size: Size of the compressed and decompressed chunks.
+    :return: The number of cells written.
+    """
+    programs = []
+    cells = _zlib_cells(src, chunk_size)
+    if cells is not None:
+        for text in cells:
+            tron = Hashtron.new()
+            tron.view.read_json(text)
+            programs.append(tron.program)
+    offsets, words = _pack(programs)
+    write_binary_weights(dst, offsets, words)
+    return len(programs)
 
 class FeedforwardNetworkIO:
     def __init__(self, net):
         self.net = net
 
-    def read_zlib_weights_from_file(self, file_name: str) -> bool:
-        with open(file_name,'rb') as f:
-            file_content=zlib.decompress(f.read())
-        if len(file_content) <= 2:
-            # empty model or uknown format
+    def read_zlib_weights_from_file(self, file_name: str, chunk_size: int = 1 << 16) -> bool:
+        """
+        Load the weights of the network from a zlib compressed JSON weights file.
+
+        The file is decompressed and parsed incrementally, every cell is handed
+        to the next hashtron of the network as soon as it has been read.
+
+        :param file_name: The weights file.
+        :param chunk_size: Size of the compressed and decompressed chunks.
+        :return: True if the number of cells in the file matches the network,
+            reading stops at the first cell the network has no hashtron for.
+        """
+        cells = _zlib_cells(file_name, chunk_size)
+        if cells is None:
             return True
-        if file_content[0] != ord('['):
-            raise ValueError("unknown model format: please fix your model, or update pyclassifier (pip is hashtron) to recognize this model")
-        decoded = file_content.decode('ascii')
-        parsed = json.loads(decoded)
-        i = 0
-        for layer in self.net.network.layers:
-            for cell in layer:
-                if i < len(parsed):
-                    cell.view.read_json(json.dumps(parsed[i]))
-                    i += 1
-                else:
+        network_cells = (cell for layer in self.net.network.layers for cell in layer)
+        try:
+            for text in cells:
+                cell = next(network_cells, None)
+                if cell is None:
+                    # more cells in the file than in the network
                     return False
-        return i == len(parsed)
+                cell.view.read_json(text)
+            # fewer cells in the file than in the network
+            return next(network_cells, None) is None
+        finally:
+            cells.close()
+            self.net.network.weights_changed()
+
+    def write_binary_weights_to_file(self, file_name: str) -> None:
+        """
+        Save the weights of the network in the binary weights format.
+
+        :param file_name: The file to write.
+        """
+        offsets, words = pack_programs(self.net.network)
+        write_binary_weights(file_name, offsets, words)
+
+    def read_binary_weights_from_file(self, file_name: str) -> bool:
+        """
+        Load the weights of the network from a binary weights file.
+
+        The file is memory-mapped and every hashtron uses a view into it as
+        its program, nothing is parsed per cell.
+
+        :param file_name: The binary weights file.
+        :return: True if the number of cells in the file matches the network.
+        """
+        with open(file_name, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if data[:4] != BINARY_MAGIC:
+            raise ValueError("unknown model format: not a binary hashtron weights file")
+        version, cells, words = np.frombuffer(data, dtype='<u4', count=3, offset=4).tolist()
+        if version != BINARY_VERSION:
+            raise ValueError(f"unsupported binary weights version {version}, please update pyclassifier (pip is hashtron)")
+        offsets = np.frombuffer(data, dtype='<u4', count=cells + 1, offset=16)
+        words = np.frombuffer(data, dtype='<u4', count=words, offset=16 + 4 * (cells + 1))
+        network_cells = [cell for layer in self.net.network.layers for cell in layer]
+        if len(network_cells) != cells:
+            return False
+        offsets = offsets.tolist()
+        for i, cell in enumerate(network_cells):
+            cell.load_program_array(words[offsets[i]:offsets[i + 1]].reshape(-1, 2))
+        self.net.network.weights_changed()
+        return True
+
+if __name__ == '__main__':
+    # Usage: python -m hashtron.net.feedforward.io model.json.zlib model.bin
+    print(convert_zlib_to_binary(sys.argv[1], sys.argv[2]), 'cells converted')
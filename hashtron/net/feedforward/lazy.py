@@ -0,0 +1,140 @@
+from hashtron.hash.hash import Hash
+from hashtron.layer.full.layer import FullLayer
+from hashtron.layer.majpool2d.layer import MajPool2DLayer
+
+class LazyEvaluator:
+    def __init__(self, network):
+        """
+        Pull-based evaluator computing only the cells the output depends on.
+
+        Reading a combiner feature evaluates the cells it reads, on demand and
+        at most once per inference, recursively down to the sample features.
+        A MajPool2D vote stops as soon as the remaining cells can't change it
+        relative to the bias, a Full feature only evaluates the bits surviving
+        its uint32 truncation. Other combiners are evaluated eagerly. The
+        outputs are the same as `FeedforwardNetwork.infer`.
+
+        :param network: The `FeedforwardNetwork` to evaluate.
+        """
+        self.network = network
+        # Cells evaluated by the last inference
+        self.evaluated = 0
+
+    def infer(self, in_val) -> int:
+        """
+        Infer the network output based on input, evaluating cells on demand.
+
+        :param in_val: The input to the network.
+        :return: The output of the network.
+        """
+        network = self.network
+        in_val = network._wrap(in_val)
+        self.evaluated = 0
+        self._input = in_val
+        # Per layer memo of the cell outputs and of the features read from them
+        self._cells = [None] * network.len_layers()
+        self._features = [{} for _ in range(network.len_layers())]
+        self._combiners = [None] * network.len_layers()
+        for l in range(0, network.len_layers(), 2):
+            self._cells[l] = [None] * len(network.layers[l])
+        val = 0
+        if network.len_layers() == 0:
+            return val ^ in_val.parity()
+        last = network.len_layers() - 1 - (network.len_layers() - 1) % 2
+        for j in range(network.output_reads(last)):
+            val |= self._feature(last, j) << j
+        return val ^ in_val.parity()
+
+    def _input_feature(self, l: int, i: int) -> int:
+        if l == 0:
+            return self._input.feature(i)
+        return self._feature(l - 2, i)
+
+    def _cell(self, l: int, i: int) -> int:
+        cells = self._cells[l]
+        bit = cells[i]
+        if bit is None:
+            network = self.network
+            self.evaluated += 1
+            feat = self._input_feature(l, i)
+            if network.premodulo[l] != 0:
+                feat = Hash.hash(feat, i, network.premodulo[l])
+            table = network.tables[l]
+            if table is not None:
+                bit = table.bit(i, feat)
+            else:
+                bit = network.layers[l][i].forward.forward(feat, False) & 1
+            cells[i] = bit
+        return bit
+
+    def _feature(self, l: int, m: int) -> int:
+        """
+        The m-th feature of the output of hashtron layer l.
+        """
+        memo = self._features[l]
+        feat = memo.get(m)
+        if feat is not None:
+            return feat
+        network = self.network
+        layer = network.combiners[l + 1] if network.len_layers() > l + 1 else None
+        if layer is None:
+            # Single cell layer, every feature is its value
+            feat = memo.get(0)
+            if feat is None:
+                self.evaluated += 1
+                x = self._input_feature(l, 0)
+                if network.premodulo[l] != 0:
+                    x = Hash.hash(x, 0, network.premodulo[l])
+                feat = network.layers[l][0].forward.forward(x, False)
+                if not network.mapping[l] > 0:
+                    feat &= 1
+                memo[0] = feat
+        elif isinstance(layer, MajPool2DLayer):
+            feat = self._majpool_feature(l, layer, m)
+        elif isinstance(layer, FullLayer):
+            feat = self._full_feature(l, layer, m)
+        else:
+            combiner = self._combiners[l]
+            if combiner is None:
+                combiner = self._combiners[l] = layer.lay()
+                for i in range(len(network.layers[l])):
+                    combiner.put(i, self._cell(l, i) != 0)
+            feat = combiner.feature(m)
+        memo[m] = feat
+        return feat
+
+    def _majpool_feature(self, l: int, layer: MajPool2DLayer, m: int) -> int:
+        cells = len(self.network.layers[l])
+        submatrix = layer.subwidth * layer.subheight
+        o = 0
+        for start in layer.feature_offsets(m):
+            # Votes so far and the votes still to come, w = ones - zeros
+            w = 0
+            remaining = submatrix
+            for n in range(start, start + submatrix):
+                if w - remaining > layer.bias or w + remaining <= layer.bias:
+                    # Decided whatever the remaining cells vote
+                    break
+                remaining -= 1
+                if n < cells and self._cell(l, n):
+                    w += 1
+                else:
+                    w -= 1
+            o <<= 1
+            if w - remaining > layer.bias:
+                o |= 1
+        return o
+
+    def _full_feature(self, l: int, layer: FullLayer, m: int) -> int:
+        cells = len(self.network.layers[l])
+        start = m * layer.bits
+        end = start + layer.maxbits
+        if end > layer.size:
+            return 0
+        o = 0
+        # Bits above the uint32 truncation are never evaluated
+        for pos in range(max(start, end - 32), end):
+            o <<= 1
+            if pos < cells and self._cell(l, pos):
+                o |= 1
+        return o
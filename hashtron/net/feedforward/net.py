@@ -1,5 +1,6 @@
 from hashtron.net.feedforward.feedforward_network import FeedforwardNetwork
 from hashtron.net.feedforward.io import FeedforwardNetworkIO
+from hashtron.net.feedforward.parallel import infer_parallel
 from hashtron.layer.layer import Layer
 
 class Net:
@@ -16,3 +17,14 @@ class Net:
 
     def new_combiner(self, layer: Layer) -> None:
         self.network.new_combiner(layer)
+
+    def infer_parallel(self, samples, processes: int = None, chunk_size: int = 1024) -> list[int]:
+        """
+        Infer the network output for many inputs using a pool of worker processes.
+
+        :param samples: The inputs to the network, they must be picklable.
+        :param processes: Number of worker processes, defaults to the CPU count.
+        :param chunk_size: Number of samples evaluated by a worker at once.
+        :return: The outputs of the network, in input order.
+        """
+        return infer_parallel(self, samples, processes, chunk_size)
@@ -0,0 +1,77 @@
+import os
+import tempfile
+import multiprocessing
+import numpy as np
+from hashtron.net.feedforward.io import pack_programs, unpack_programs
+
+# The network of the current worker process
+_worker_net = None
+
+def topology(network) -> list:
+    """
+    Describe the structure of a network without its weights.
+
+    :param network: The FeedforwardNetwork to describe.
+    :return: A picklable list of (cells, bits, premodulo, combiner) per layer.
+    """
+    return [(len(network.layers[l]), network.mapping[l], network.premodulo[l], network.combiners[l])
+            for l in range(network.len_layers())]
+
+def build(topo):
+    """
+    Create a Net from a `topology` description, with random weights.
+
+    :param topo: The network description.
+    :return: The new Net.
+    """
+    from hashtron.net.feedforward.net import Net
+    net = Net.new()
+    for cells, bits, premodulo, combiner in topo:
+        if combiner is not None:
+            net.new_combiner(combiner)
+        else:
+            net.new_layer(cells, bits, premodulo)
+    return net
+
+def _init_worker(topo, file_name: str, cells: int, table_budget) -> None:
+    global _worker_net
+    net = build(topo)
+    data = np.memmap(file_name, dtype=np.uint32, mode='r')
+    unpack_programs(net.network, data[:cells + 1], data[cells + 1:])
+    del data
+    if table_budget is not None:
+        net.network.compile_tables(table_budget)
+    _worker_net = net
+
+def _infer_chunk(samples) -> list[int]:
+    return _worker_net.network.infer_batch(samples)
+
+def infer_parallel(net, samples, processes: int = None, chunk_size: int = 1024) -> list[int]:
+    """
+    Infer the network output for many inputs using a pool of worker processes.
+
+    The weights are written once to a memory-mapped file which every worker
+    loads, only the samples are sent to the workers.
+
+    :param net: The Net to evaluate.
+    :param samples: The inputs to the network, they must be picklable.
+    :param processes: Number of worker processes, defaults to the CPU count.
+    :param chunk_size: Number of samples evaluated by a worker at once.
+    :return: The outputs of the network, in input order.
+    """
+    samples = list(samples)
+    if not samples:
+        return []
+    offsets, words = pack_programs(net.network)
+    fd, file_name = tempfile.mkstemp(suffix='.weights')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(offsets.tobytes())
+            f.write(words.tobytes())
+        chunks = [samples[i:i + chunk_size] for i in range(0, len(samples), chunk_size)]
+        initargs = (topology(net.network), file_name, len(offsets) - 1, net.network.table_budget)
+        with multiprocessing.Pool(processes, _init_worker, initargs) as pool:
+            results = pool.map(_infer_chunk, chunks)
+    finally:
+        os.remove(file_name)
+    return [pred for chunk in results for pred in chunk]
@@ -0,0 +1,120 @@
+import threading
+import time
+
+class LayerStats:
+    def __init__(self, layer: int, cells: int = 0):
+        """
+        Time and work spent in one hashtron layer, and the combiner after it.
+
+        Times are wall clock seconds. Feature reads are the inputs read by the
+        layer: sample features for the first layer, combiner features for the
+        others.
+
+        :param layer: The layer index.
+        :param cells: Number of hashtrons in the layer.
+        """
+        self.layer = layer
+        self.cells = cells
+        self.calls = 0
+        self.wall = 0.0
+        self.feature_time = 0.0
+        self.feature_reads = 0
+        self.premodulo_time = 0.0
+        self.hashtron_time = 0.0
+        self.cell_evaluations = 0
+        self.hash_calls = 0
+        self.table_lookups = 0
+        self.combiner_time = 0.0
+        self.combiner_puts = 0
+        self._last = 0.0
+
+    def lap(self, name: str = None) -> float:
+        """
+        Add the time since the previous lap to a time field.
+
+        :param name: The field, for example 'hashtron_time'. None only starts the clock.
+        :return: The current time.
+        """
+        now = time.perf_counter()
+        if name is not None:
+            setattr(self, name, getattr(self, name) + now - self._last)
+        self._last = now
+        return now
+
+    def add(self, other: 'LayerStats') -> None:
+        for name, val in other.as_dict().items():
+            if name not in ('layer', 'cells'):
+                setattr(self, name, getattr(self, name) + val)
+
+    def as_dict(self) -> dict:
+        return {name: val for name, val in vars(self).items() if not name.startswith('_')}
+
+    def __repr__(self) -> str:
+        return (f"LayerStats(layer={self.layer}, calls={self.calls}, wall={self.wall:.6f}, "
+                f"feature={self.feature_time:.6f}, premodulo={self.premodulo_time:.6f}, "
+                f"hashtron={self.hashtron_time:.6f}, combiner={self.combiner_time:.6f}, "
+                f"cells={self.cell_evaluations}, hashes={self.hash_calls}, reads={self.feature_reads})")
+
+class InferenceStats:
+    def __init__(self, callback=None):
+        """
+        Per layer profile of the inferences of a network, see `FeedforwardNetwork.enable_stats`.
+
+        Inferences running in several threads may add to the same stats.
+
+        :param callback: Called after every inference with the list of
+            `LayerStats` of that inference and its total wall time.
+        """
+        self.callback = callback
+        self.samples = 0
+        self.wall = 0.0
+        self.output_reads = 0
+        self.layers = {}
+        self._lock = threading.Lock()
+
+    def add(self, layers: list, wall: float, output_reads: int) -> None:
+        """
+        Accumulate the stats of one inference.
+        """
+        with self._lock:
+            self.samples += 1
+            self.wall += wall
+            self.output_reads += output_reads
+            for stats in layers:
+                total = self.layers.get(stats.layer)
+                if total is None:
+                    total = self.layers[stats.layer] = LayerStats(stats.layer, stats.cells)
+                total.add(stats)
+        if self.callback is not None:
+            self.callback(layers, wall)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.samples = 0
+            self.wall = 0.0
+            self.output_reads = 0
+            self.layers = {}
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                'samples': self.samples,
+                'wall': self.wall,
+                'output_reads': self.output_reads,
+                'layers': [self.layers[l].as_dict() for l in sorted(self.layers)],
+            }
+
+    def report(self) -> str:
+        """
+        Table of the time spent per layer, as a share of the total.
+        """
+        lines = [f"{self.samples} inferences, {self.wall:.6f}s"]
+        lines.append(f"{'layer':>5} {'cells':>6} {'wall':>10} {'%':>6} {'feature':>10} {'premod':>10} "
+                     f"{'hashtron':>10} {'combiner':>10} {'hashes':>10}")
+        for l in sorted(self.layers):
+            s = self.layers[l]
+            share = 100 * s.wall / self.wall if self.wall else 0.0
+            lines.append(f"{l:>5} {s.cells:>6} {s.wall:>10.6f} {share:>6.1f} {s.feature_time:>10.6f} "
+                         f"{s.premodulo_time:>10.6f} {s.hashtron_time:>10.6f} {s.combiner_time:>10.6f} "
+                         f"{s.hash_calls:>10}")
+        return '\n'.join(lines)
@@ -0,0 +1,41 @@
+import numpy as np
+
+class TruthTable:
+    def __init__(self, cells: list, premodulo: int):
+        """
+        Packed truth table of the output bit of every hashtron in a layer.
+
+        Only valid when the layer inputs are reduced to [0, premodulo),
+        bit x of row i holds the output bit of cell i for input x.
+
+        :param cells: The hashtrons of the layer.
+        :param premodulo: Size of the input domain of every cell.
+        """
+        self.premodulo = premodulo
+        self.stride = TruthTable.row_size(premodulo)
+        domain = np.arange(premodulo, dtype=np.uint32)
+        bits = np.empty((len(cells), premodulo), dtype=bool)
+        for i, cell in enumerate(cells):
+            bits[i] = (cell.forward.forward_array(domain, False) & 1) != 0
+        # One immutable buffer, the array is a view used by the batch path
+        self.data = np.packbits(bits, axis=1, bitorder='little').tobytes()
+        self.array = np.frombuffer(self.data, dtype=np.uint8).reshape(len(cells), self.stride)
+
+    @staticmethod
+    def row_size(premodulo: int) -> int:
+        """Bytes needed to store one cell over a premodulo sized domain."""
+        return (premodulo + 7) // 8
+
+    def bit(self, i: int, x: int) -> int:
+        """Output bit of cell i for input x."""
+        return (self.data[i * self.stride + (x >> 3)] >> (x & 7)) & 1
+
+    def bits(self, x: np.ndarray) -> np.ndarray:
+        """
+        Output bits of all cells for a batch of inputs.
+
+        :param x: Array of shape (batch, cells) with the inputs of every cell.
+        :return: Boolean array of shape (batch, cells).
+        """
+        packed = self.array[np.arange(x.shape[1]), x >> np.uint32(3)]
+        return ((packed >> (x & np.uint32(7))) & 1) != 0
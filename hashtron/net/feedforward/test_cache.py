@@ -0,0 +1,77 @@
+import unittest
+import os
+import random
+import tempfile
+import threading
+from hashtron.datasets.squareroot.api import medium
+from benchmarks.workloads import mnist_net, sqrt_net, byte_samples
+
+
+class TestInferCache(unittest.TestCase):
+    def test_cache(self):
+        tron = sqrt_net(5)
+        samples = medium()[:100]
+        expected = [tron.network.infer(s) for s in samples]
+        cache = tron.network.enable_cache(64)
+        # Fresh sample objects with the same values hit the cache
+        self.assertEqual([tron.network.infer(s) for s in samples], expected)
+        self.assertEqual([tron.network.infer(s) for s in medium()[36:100]], expected[36:])
+        self.assertEqual(cache.info(), {'hits': 64, 'misses': 100, 'size': 64, 'maxsize': 64})
+        self.assertEqual(tron.network.infer_batch(medium()[:100] * 2), expected * 2)
+        self.assertEqual(tron.network.infer_batch(range(10)), [tron.network.infer(i) for i in range(10)])
+
+    def test_byte_samples(self):
+        tron = mnist_net(6)
+        samples = byte_samples(20, seed=6)
+        expected = [tron.network.infer(s) for s in samples]
+        cache = tron.network.enable_cache()
+        copies = [type(s)(bytes(s.buf), s.out) for s in samples]
+        self.assertEqual(tron.network.infer_batch(samples), expected)
+        self.assertEqual([tron.network.infer(s) for s in copies], expected)
+        self.assertEqual(cache.hits, 20)
+
+    def test_invalidation(self):
+        tron = sqrt_net(7)
+        other = sqrt_net(8)
+        cache = tron.network.enable_cache()
+        before = tron.network.infer_batch(range(50))
+        with tempfile.TemporaryDirectory() as d:
+            file_name = os.path.join(d, 'weights.bin')
+            other.io.write_binary_weights_to_file(file_name)
+            self.assertTrue(tron.io.read_binary_weights_from_file(file_name))
+        self.assertEqual(len(cache), 0)
+        after = [other.network.infer(i) for i in range(50)]
+        self.assertNotEqual(before, after)
+        self.assertEqual(tron.network.infer_batch(range(50)), after)
+
+    def test_threads(self):
+        tron = sqrt_net(11)
+        expected = [tron.network.infer(i) for i in range(24)]
+        # A small cache keeps evicting while the threads read it
+        cache = tron.network.enable_cache(16)
+        results = [None] * 4
+        errors = []
+
+        def run(t):
+            try:
+                rng = random.Random(t)
+                values = [rng.randrange(24) for _ in range(500)]
+                results[t] = (values, [tron.network.infer(v) for v in values])
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run, args=(t,)) for t in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        for values, outputs in results:
+            self.assertEqual(outputs, [expected[v] for v in values])
+        info = cache.info()
+        self.assertEqual(info['hits'] + info['misses'], 4 * 500)
+        self.assertLessEqual(info['size'], 16)
+
+
+if __name__ == '__main__':
+    unittest.main()
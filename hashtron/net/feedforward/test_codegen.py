@@ -0,0 +1,71 @@
+import unittest
+import os
+import tempfile
+from hashtron.net.feedforward.net import Net
+from hashtron.net.feedforward.codegen import compile_infer, write_module, load_module
+from benchmarks.workloads import mnist_net, sqrt_net, byte_samples, randomize
+from hashtron.layer.full.layer import FullLayer
+from hashtron.datasets.squareroot.api import medium
+
+
+class FeatureOnly:
+    # Hides the bulk features of a sample, the network reads them one by one
+    def __init__(self, sample):
+        self.sample = sample
+
+    def feature(self, n):
+        return self.sample.feature(n)
+
+    def parity(self):
+        return self.sample.parity()
+
+
+class Pairs:
+    # A combiner the code generator doesn't know
+    def lay(self):
+        return FullLayer(4, 2, 2).lay()
+
+
+class TestCodegen(unittest.TestCase):
+    def test_mnist_shaped(self):
+        tron = mnist_net(15)
+        samples = byte_samples(30, seed=15)
+        infer = compile_infer(tron.network)
+        self.assertEqual([infer(s) for s in samples], [tron.network.infer(s) for s in samples])
+        self.assertEqual([infer(FeatureOnly(s)) for s in samples[:5]], [tron.network.infer(s) for s in samples[:5]])
+
+    def test_sqrt_shaped(self):
+        tron = sqrt_net(16)
+        infer = compile_infer(tron.network)
+        self.assertEqual([infer(s) for s in medium()[:50]], [tron.network.infer(s) for s in medium()[:50]])
+        self.assertEqual([infer(i) for i in range(20)], [tron.network.infer(i) for i in range(20)])
+
+    def test_tables(self):
+        tron = mnist_net(17)
+        samples = byte_samples(30, seed=17)
+        expected = [tron.network.infer(s) for s in samples]
+        tron.network.compile_tables()
+        self.assertEqual([compile_infer(tron.network)(s) for s in samples], expected)
+
+    def test_module(self):
+        tron = Net.new()
+        tron.new_layer(4, 0, 1 << 8)
+        tron.new_combiner(FullLayer(4, 2, 2))
+        tron.new_layer(2, 3)
+        randomize(tron, 18)
+        with tempfile.TemporaryDirectory() as d:
+            file_name = os.path.join(d, 'net.py')
+            write_module(tron.network, file_name)
+            module = load_module(file_name)
+        self.assertEqual([module.infer(i) for i in range(100)], [tron.network.infer(i) for i in range(100)])
+
+    def test_unknown_combiner(self):
+        tron = Net.new()
+        tron.new_layer(4, 0)
+        tron.new_combiner(Pairs())
+        with self.assertRaises(ValueError):
+            compile_infer(tron.network)
+
+
+if __name__ == '__main__':
+    unittest.main()
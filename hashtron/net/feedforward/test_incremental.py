@@ -0,0 +1,74 @@
+import unittest
+import random
+from hashtron.net.feedforward.net import Net
+from hashtron.net.feedforward.incremental import IncrementalEvaluator
+from benchmarks.workloads import mnist_net, sqrt_net, randomize
+from hashtron.layer.full.layer import FullLayer
+from hashtron.datasets.stringhash.bytehash import ByteSample, BalancedByteSample
+from hashtron.datasets.squareroot.api import medium
+
+
+class Generic:
+    # A combiner without a known dependency map
+    def lay(self):
+        return FullLayer(8, 2, 3).lay()
+
+
+def edited_samples(count, size, seed):
+    # Consecutive buffers differing in a few bytes
+    rng = random.Random(seed)
+    buf = bytearray(rng.randint(0, 255) for _ in range(size))
+    samples = []
+    for i in range(count):
+        for _ in range(rng.randint(0, 3)):
+            buf[rng.randrange(size)] = rng.randint(0, 255)
+        cls = BalancedByteSample if i % 3 else ByteSample
+        samples.append(cls(bytes(buf), 0))
+    return samples
+
+
+class TestIncrementalEvaluator(unittest.TestCase):
+    def check(self, tron, samples):
+        evaluator = IncrementalEvaluator(tron.network)
+        self.assertEqual([evaluator.infer(s) for s in samples], [tron.network.infer(s) for s in samples])
+        return evaluator
+
+    def test_mnist_shaped(self):
+        tron = mnist_net(19)
+        evaluator = self.check(tron, edited_samples(100, 169, 19))
+        samples = edited_samples(2, 169, 20)
+        evaluator.infer(samples[0])
+        self.assertEqual(evaluator.evaluated, 105)
+        evaluator.infer(samples[0])
+        self.assertEqual(evaluator.evaluated, 0)
+
+    def test_tables(self):
+        tron = mnist_net(21)
+        tron.network.compile_tables()
+        self.check(tron, edited_samples(50, 169, 21))
+
+    def test_resize(self):
+        tron = mnist_net(22)
+        self.check(tron, edited_samples(10, 169, 22) + edited_samples(10, 100, 23) + edited_samples(10, 169, 24))
+
+    def test_list_buffer(self):
+        tron = mnist_net(27)
+        self.check(tron, [type(s)(list(s.buf), s.out) for s in edited_samples(20, 169, 27)])
+
+    def test_combiners(self):
+        tron = Net.new()
+        tron.new_layer(8, 0, 1 << 8)
+        tron.new_combiner(Generic())
+        tron.new_layer(4, 0, 1 << 8)
+        tron.new_combiner(FullLayer(4, 1, 2))
+        tron.new_layer(1, 4)
+        randomize(tron, 25)
+        self.check(tron, edited_samples(50, 32, 25))
+
+    def test_fallback(self):
+        tron = sqrt_net(26)
+        self.check(tron, medium()[:20] + edited_samples(5, 64, 26) + list(range(5)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from hashtron.net.input import Input
+from hashtron.net.single_value import SingleValue
+from hashtron.net.feedforward.feedforward_network import FeedforwardNetwork
+from hashtron.net.feedforward.net import Net
+from hashtron.layer.majpool2d.layer import MajPool2DLayer
+from hashtron.datasets.squareroot.api import medium
+from benchmarks.workloads import mnist_net, sqrt_net, byte_samples
+
+
+class TestInferBatch(unittest.TestCase):
+    def test_mnist_shaped(self):
+        tron = mnist_net()
+        samples = byte_samples(50)
+        expected = [tron.network.infer(s) for s in samples]
+        self.assertEqual(tron.network.infer_batch(samples), expected)
+
+    def test_sqrt_shaped(self):
+        tron = sqrt_net()
+        samples = medium()[:200]
+        expected = [tron.network.infer(s) for s in samples]
+        self.assertEqual(tron.network.infer_batch(samples), expected)
+
+    def test_int_inputs(self):
+        tron = sqrt_net(1)
+        self.assertEqual(tron.network.infer_batch(range(100)), [tron.network.infer(i) for i in range(100)])
+        self.assertEqual(tron.network.infer_batch([]), [])
+
+    def test_wrap(self):
+        wrap = FeedforwardNetwork._wrap
+        sample = byte_samples(1)[0]
+        self.assertIs(wrap(sample), sample)
+        self.assertIsInstance(wrap(5), SingleValue)
+        self.assertEqual(wrap(5).feature(0), 5)
+
+        class Raw:
+            def feature(self, n):
+                return n
+
+        self.assertIsInstance(wrap(Raw()), Input)
+
+    def test_negative_modulus(self):
+        tron = Net.new()
+        tron.new_layer(4, 0, 1 << 8)
+        tron.new_combiner(MajPool2DLayer(4, 1, 1, 1, 4, 1, 1))
+        tron.new_layer(1, 0)
+        for cell in tron.network.layers[0] + tron.network.layers[2]:
+            cell.program = [[1, 10], [3, 20]]
+        self.assertEqual(tron.network.infer_batch(range(200)), [tron.network.infer(i) for i in range(200)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import os
+import json
+import zlib
+import tempfile
+from hashtron.net.feedforward.io import convert_zlib_to_binary
+from benchmarks.workloads import mnist_net, byte_samples
+
+
+def write_zlib_weights(tron, file_name):
+    programs = [cell.program for layer in tron.network.layers for cell in layer]
+    with open(file_name, 'wb') as f:
+        f.write(zlib.compress(json.dumps(programs).encode('ascii')))
+
+
+class TestWeightsIO(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.samples = byte_samples(30, seed=5)
+        self.tron = mnist_net(5)
+        self.expected = [self.tron.network.infer(s) for s in self.samples]
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.dir.name, name)
+
+    def test_zlib(self):
+        write_zlib_weights(self.tron, self.path('w.json.zlib'))
+        tron = mnist_net(6)
+        self.assertTrue(tron.io.read_zlib_weights_from_file(self.path('w.json.zlib')))
+        self.assertEqual([tron.network.infer(s) for s in self.samples], self.expected)
+
+    def test_zlib_streaming(self):
+        write_zlib_weights(self.tron, self.path('w.json.zlib'))
+        tron = mnist_net(6)
+        # Tiny chunks split cells and numbers across chunk boundaries
+        self.assertTrue(tron.io.read_zlib_weights_from_file(self.path('w.json.zlib'), chunk_size=7))
+        self.assertEqual([tron.network.infer(s) for s in self.samples], self.expected)
+        # More cells in the file than in the network
+        small = mnist_net(6)
+        small.network.layers[-2].pop()
+        self.assertFalse(small.io.read_zlib_weights_from_file(self.path('w.json.zlib')))
+        # Fewer cells in the file than in the network
+        tron.new_layer(1, 0)
+        self.assertFalse(tron.io.read_zlib_weights_from_file(self.path('w.json.zlib')))
+
+    def test_zlib_format(self):
+        with open(self.path('empty.json.zlib'), 'wb') as f:
+            f.write(zlib.compress(b'[]'))
+        self.assertTrue(self.tron.io.read_zlib_weights_from_file(self.path('empty.json.zlib')))
+        with open(self.path('bad.json.zlib'), 'wb') as f:
+            f.write(zlib.compress(b'{"a": 1}'))
+        with self.assertRaises(ValueError):
+            self.tron.io.read_zlib_weights_from_file(self.path('bad.json.zlib'))
+        with open(self.path('truncated.json.zlib'), 'wb') as f:
+            f.write(zlib.compress(json.dumps([[[1, 2]]] * 100).encode('ascii'))[:-10])
+        with self.assertRaises(zlib.error):
+            self.tron.io.read_zlib_weights_from_file(self.path('truncated.json.zlib'))
+
+    def test_binary(self):
+        self.tron.io.write_binary_weights_to_file(self.path('w.bin'))
+        tron = mnist_net(6)
+        self.assertTrue(tron.io.read_binary_weights_from_file(self.path('w.bin')))
+        self.assertEqual([tron.network.infer(s) for s in self.samples], self.expected)
+        self.assertEqual(tron.network.infer_batch(self.samples), self.expected)
+        self.assertEqual(tron.network.layers[0][0].program, self.tron.network.layers[0][0].program)
+
+    def test_convert(self):
+        write_zlib_weights(self.tron, self.path('w.json.zlib'))
+        self.assertEqual(convert_zlib_to_binary(self.path('w.json.zlib'), self.path('w.bin')), 105)
+        # Streamed in chunks smaller than a cell, the output is the same
+        self.assertEqual(convert_zlib_to_binary(self.path('w.json.zlib'), self.path('w7.bin'), chunk_size=7), 105)
+        with open(self.path('w.bin'), 'rb') as f, open(self.path('w7.bin'), 'rb') as f7:
+            self.assertEqual(f.read(), f7.read())
+        tron = mnist_net(6)
+        self.assertTrue(tron.io.read_binary_weights_from_file(self.path('w.bin')))
+        self.assertEqual([tron.network.infer(s) for s in self.samples], self.expected)
+        # Shape mismatch
+        tron.new_layer(1, 0)
+        self.assertFalse(tron.io.read_binary_weights_from_file(self.path('w.bin')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+from hashtron.net.feedforward.net import Net
+from hashtron.net.feedforward.lazy import LazyEvaluator
+from benchmarks.workloads import mnist_net, sqrt_net, byte_samples, randomize
+from hashtron.layer.full.layer import FullLayer
+from hashtron.layer.majpool2d.layer import MajPool2DLayer
+from hashtron.datasets.squareroot.api import medium
+
+
+class Generic:
+    # A combiner without a known dependency map
+    def lay(self):
+        return FullLayer(8, 2, 3).lay()
+
+
+class TestLazyEvaluator(unittest.TestCase):
+    def check(self, tron, samples):
+        evaluator = LazyEvaluator(tron.network)
+        self.assertEqual([evaluator.infer(s) for s in samples], [tron.network.infer(s) for s in samples])
+        return evaluator
+
+    def test_mnist_shaped(self):
+        self.check(mnist_net(27), byte_samples(30, seed=27))
+
+    def test_sqrt_shaped(self):
+        tron = sqrt_net(28)
+        evaluator = self.check(tron, medium()[:50] + list(range(5)))
+        # Majority votes of 12 cells are mostly decided early
+        self.assertLess(evaluator.evaluated, sum(len(layer) for layer in tron.network.layers))
+
+    def test_tables(self):
+        tron = mnist_net(29)
+        tron.network.compile_tables()
+        self.check(tron, byte_samples(30, seed=29))
+
+    def test_bias(self):
+        for bias in (-3, -1, 1, 2):
+            tron = Net.new()
+            # 20 submatrices of 4 cells, every feature pools 4 of them
+            tron.new_layer(20*4, 0, 1 << 10)
+            tron.new_combiner(MajPool2DLayer(20, 1, 4, 1, 4, 1, 1, bias))
+            tron.new_layer(4, 0, 1 << 10)
+            tron.new_combiner(FullLayer(4, 1, 1))
+            randomize(tron, 30 + bias)
+            self.check(tron, byte_samples(20, seed=30))
+
+    def test_combiners(self):
+        tron = Net.new()
+        tron.new_layer(8, 0, 1 << 8)
+        tron.new_combiner(Generic())
+        tron.new_layer(4, 0, 1 << 8)
+        tron.new_combiner(FullLayer(4, 1, 2))
+        tron.new_layer(1, 4)
+        randomize(tron, 31)
+        self.check(tron, byte_samples(20, size=32, seed=31))
+
+    def test_empty(self):
+        self.check(Net.new(), [1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,16 @@
+import unittest
+from benchmarks.workloads import mnist_net, byte_samples
+
+
+class TestInferParallel(unittest.TestCase):
+    def test_parallel(self):
+        tron = mnist_net(4)
+        samples = byte_samples(100, seed=4)
+        expected = [tron.network.infer(s) for s in samples]
+        self.assertEqual(tron.infer_parallel(samples, processes=2, chunk_size=16), expected)
+        tron.network.compile_tables()
+        self.assertEqual(tron.infer_parallel(samples, processes=2, chunk_size=16), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
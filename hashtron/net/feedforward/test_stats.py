@@ -0,0 +1,64 @@
+import unittest
+import threading
+from hashtron.net.feedforward.stats import LayerStats
+from benchmarks.workloads import mnist_net, sqrt_net, byte_samples
+
+
+class TestInferStats(unittest.TestCase):
+    def test_stats(self):
+        tron = mnist_net(9)
+        samples = byte_samples(10, seed=9)
+        expected = [tron.network.infer(s) for s in samples]
+        calls = []
+        stats = tron.network.enable_stats(lambda layers, wall: calls.append((layers, wall)))
+        self.assertEqual([tron.network.infer(s) for s in samples], expected)
+        self.assertEqual(stats.samples, 10)
+        self.assertEqual(len(calls), 10)
+        self.assertEqual(sorted(stats.layers), [0, 2, 4])
+        self.assertEqual([stats.layers[l].cell_evaluations for l in (0, 2, 4)], [800, 200, 50])
+        self.assertEqual(stats.layers[2].combiner_puts, 200)
+        self.assertEqual(stats.output_reads, 50)
+        self.assertGreater(stats.layers[0].hash_calls, 800)
+        self.assertLessEqual(sum(s.wall for s in stats.layers.values()), stats.wall)
+        self.assertIn('10 inferences', stats.report())
+        tron.network.disable_stats()
+        self.assertEqual([tron.network.infer(s) for s in samples], expected)
+        self.assertEqual(stats.samples, 10)
+
+    def test_stats_tables(self):
+        tron = sqrt_net(10)
+        expected = [tron.network.infer(i) for i in range(20)]
+        tron.network.compile_tables()
+        stats = tron.network.enable_stats()
+        self.assertEqual([tron.network.infer(i) for i in range(20)], expected)
+        self.assertEqual(stats.layers[0].table_lookups, 20 * 3*12*3*12)
+        self.assertEqual(stats.layers[4].cell_evaluations, 20)
+
+    def test_threads(self):
+        tron = mnist_net(13)
+        samples = byte_samples(10, seed=13)
+        stats = tron.network.enable_stats()
+        threads = [threading.Thread(target=lambda: [tron.network.infer(s) for s in samples]) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(stats.samples, 40)
+        self.assertEqual([stats.layers[l].cell_evaluations for l in (0, 2, 4)], [3200, 800, 200])
+
+    def test_forward(self):
+        tron = mnist_net(12)
+        sample = byte_samples(1, seed=12)[0]
+        for worst in (-1, 0, 17):
+            for neg in (0, 1):
+                combiner, computed = tron.network.forward(sample, 0, worst, neg)
+                stats = LayerStats(0, 80)
+                profiled, profiled_computed = tron.network.forward(sample, 0, worst, neg, stats)
+                self.assertEqual([profiled.feature(m) for m in range(20)], [combiner.feature(m) for m in range(20)])
+                self.assertEqual(profiled_computed, computed)
+                self.assertEqual(stats.calls, 1)
+                self.assertEqual(stats.cell_evaluations, 80)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+from hashtron.net.feedforward.net import Net
+from hashtron.layer.majpool2d.layer import MajPool2DLayer
+from benchmarks.workloads import mnist_net, byte_samples
+
+
+class TestTruthTables(unittest.TestCase):
+    def test_tables(self):
+        tron = mnist_net(2)
+        samples = byte_samples(30, seed=2)
+        expected = [tron.network.infer(s) for s in samples]
+        # One bit per cell and input: 80 and 20 cells over 1 << 10, 5 cells over 1 << 16
+        self.assertEqual(tron.network.compile_tables(), 80 * 128 + 20 * 128 + 5 * 8192)
+        self.assertTrue(all(t is not None for t in tron.network.tables[0::2]))
+        self.assertEqual([tron.network.infer(s) for s in samples], expected)
+        self.assertEqual(tron.network.infer_batch(samples), expected)
+
+    def test_budget(self):
+        tron = mnist_net(3)
+        samples = byte_samples(30, seed=3)
+        expected = [tron.network.infer(s) for s in samples]
+        # Only the 20 cell layer fits, the others keep hashing
+        self.assertEqual(tron.network.compile_tables(4096), 20 * 128)
+        self.assertEqual([t is not None for t in tron.network.tables[0::2]], [False, True, False])
+        self.assertEqual([tron.network.infer(s) for s in samples], expected)
+        self.assertEqual(tron.network.infer_batch(samples), expected)
+
+    def test_negative_modulus(self):
+        tron = Net.new()
+        tron.new_layer(4, 0, 1 << 8)
+        tron.new_combiner(MajPool2DLayer(4, 1, 1, 1, 4, 1, 1))
+        tron.new_layer(1, 0)
+        # The cumulative modulus 10 - 20 is negative
+        for cell in tron.network.layers[0] + tron.network.layers[2]:
+            cell.program = [[1, 10], [3, 20]]
+        expected = [tron.network.infer(i) for i in range(200)]
+        tron.network.compile_tables()
+        self.assertIsNotNone(tron.network.tables[0])
+        self.assertEqual([tron.network.infer(i) for i in range(200)], expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,24 +1,39 @@
-class Input:
+import numpy as np
+from hashtron.net.sample import Sample
+
+class Input(Sample):
     def __init__(self, obj):
         # Check if the wrapped object has a 'feature' method
         if not hasattr(obj, 'feature') or not callable(obj.feature):
             raise ValueError("The wrapped object must have a 'feature' method.")
         self.obj = obj
 
+    @property
+    def memoize(self) -> bool:
+        # Values derived from a mutable wrapped object aren't memoized either
+        return getattr(self.obj, 'memoize', True)
+
     def feature(self, n: int) -> int:
-        # Call the wrapped object's feature method
-        result = self.obj.feature(n)
-        
-        # Check if the wrapped object has a 'parity' method
-        if hasattr(self.obj, 'parity') and callable(self.obj.parity):
-            # If it does, XOR the result with the parity
-            result ^= self.obj.parity()
-        
-        return result
+        # Call the wrapped object's feature method, XOR the result with the parity
+        return self.obj.feature(n) ^ self.parity()
+
+    def features(self, count: int) -> np.ndarray:
+        # The parity is applied once to all the features
+        if hasattr(self.obj, 'features') and callable(self.obj.features):
+            feats = np.asarray(self.obj.features(count)).astype(np.uint32)
+        else:
+            feats = np.array([self.obj.feature(n) & 0xFFFFFFFF for n in range(count)], dtype=np.uint32)
+        return feats ^ np.uint32(self.parity() & 0xFFFFFFFF)
 
     def parity(self) -> int:
+        # Computed once per wrapped object, see Sample
         # Check if the wrapped object has a 'parity' method
         if hasattr(self.obj, 'parity') and callable(self.obj.parity):
             # If it does, return the parity
             return self.obj.parity()
         return 0
+
+    def fingerprint(self):
+        if hasattr(self.obj, 'fingerprint') and callable(self.obj.fingerprint):
+            return self.obj.fingerprint()
+        return None
@@ -0,0 +1,90 @@
+import abc
+import functools
+import hashlib
+import numpy as np
+
+def memoized(method):
+    """
+    Cache the result of a sample method taking no arguments on the sample.
+
+    Samples are immutable once created, so values derived from them, like
+    the parity, only need to be computed once per sample. Samples viewing a
+    buffer which may still change set `memoize` to False and are computed
+    on every call.
+    """
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self):
+        if not getattr(self, 'memoize', True):
+            return method(self)
+        memo = self.__dict__.get('_memo')
+        if memo is None:
+            memo = self._memo = {}
+        if name not in memo:
+            memo[name] = method(self)
+        return memo[name]
+
+    return wrapper
+
+def buffer_array(buf) -> np.ndarray:
+    """
+    View a sample buffer as a uint8 array.
+
+    Bytes-like buffers are viewed without a copy, other sequences of byte
+    values, like lists, are converted.
+    """
+    if isinstance(buf, (bytes, bytearray, memoryview)):
+        return np.frombuffer(buf, dtype=np.uint8)
+    return np.asarray(buf, dtype=np.uint8)
+
+def buffer_digest(buf) -> bytes:
+    """
+    Stable content hash of a sample buffer, see `buffer_array`.
+    """
+    return hashlib.blake2b(buffer_array(buf), digest_size=16).digest()
+
+class Sample(abc.ABC):
+    """
+    Base class for network inputs.
+
+    A sample provides `feature(n)` for the n-th input of the first layer and
+    `parity()` which balances the output. `features(count)` returns the first
+    features at once, samples which can compute them in bulk override it.
+    Derived per-sample values should be decorated with `memoized`, the parity
+    and the fingerprint are memoized by default.
+    """
+    # False for samples whose buffer may change after they are created
+    memoize = True
+
+    @abc.abstractmethod
+    def feature(self, n: int) -> int:
+        """
+        The n-th input of the first layer.
+        """
+
+    def features(self, count: int) -> np.ndarray:
+        """
+        The first `count` features as a uint32 array.
+        """
+        return np.array([self.feature(n) & 0xFFFFFFFF for n in range(count)], dtype=np.uint32)
+
+    def parity(self) -> int:
+        return 0
+
+    def fingerprint(self):
+        """
+        Hashable key identifying the network input, None if it has none.
+
+        Samples with equal fingerprints must have the same features and parity,
+        so the network output can be cached by it.
+        """
+        return None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Overridden parity and fingerprint of custom samples get memoized too
+        for name in ('parity', 'fingerprint'):
+            method = cls.__dict__.get(name)
+            if method is not None and not hasattr(method, '__wrapped__'):
+                setattr(cls, name, memoized(method))
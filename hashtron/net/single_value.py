@@ -1,9 +1,18 @@
-class SingleValue:
+import numpy as np
+from hashtron.net.sample import Sample
+
+class SingleValue(Sample):
     def __init__(self, num):
         self.num = num
 
     def feature(self, n: int) -> int:
         return self.num
 
+    def features(self, count: int) -> np.ndarray:
+        return np.full(count, self.num & 0xFFFFFFFF, dtype=np.uint32)
+
     def parity(self) -> int:
         return 0
+
+    def fingerprint(self):
+        return (type(self), self.num)
@@ -0,0 +1,43 @@
+import unittest
+from hashtron.net.input import Input
+from hashtron.net.single_value import SingleValue
+from hashtron.datasets.squareroot.api import medium
+from benchmarks.workloads import mnist_net, sqrt_net, byte_samples
+
+
+class FeatureOnly:
+    # Hides the bulk features of a sample, the network reads them one by one
+    def __init__(self, sample):
+        self.sample = sample
+
+    def feature(self, n):
+        return self.sample.feature(n)
+
+    def parity(self):
+        return self.sample.parity()
+
+
+class TestBulkFeatures(unittest.TestCase):
+    def test_features(self):
+        for tron, samples in ((mnist_net(13), byte_samples(20, seed=13)), (sqrt_net(13), medium()[:50])):
+            expected = [tron.network.infer(FeatureOnly(s)) for s in samples]
+            self.assertEqual([tron.network.infer(s) for s in samples], expected)
+            self.assertEqual(tron.network.infer_batch([FeatureOnly(s) for s in samples]), expected)
+
+    def test_input(self):
+        sample = byte_samples(2, seed=14)[1]
+        self.assertEqual(Input(sample).features(30).tolist(), [Input(sample).feature(n) for n in range(30)])
+        self.assertEqual(Input(FeatureOnly(sample)).features(30).tolist(), [Input(sample).feature(n) for n in range(30)])
+        self.assertEqual(SingleValue(-1).features(3).tolist(), [0xFFFFFFFF] * 3)
+
+    def test_list_buffer(self):
+        tron = mnist_net(15)
+        for sample in byte_samples(4, seed=15):
+            listed = type(sample)(list(sample.buf), sample.out)
+            self.assertEqual(listed.features(30).tolist(), [sample.feature(n) for n in range(30)])
+            self.assertEqual(listed.fingerprint(), sample.fingerprint())
+            self.assertEqual(tron.network.infer_batch([listed]), [tron.network.infer(sample)])
+
+
+if __name__ == '__main__':
+    unittest.main()
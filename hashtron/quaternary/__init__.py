@@ -6,12 +6,19 @@ See blog post and Go package
     https://github.com/neurlang/quaternary
 """
 
+import mmap
+import multiprocessing
 from typing import Dict
+import numpy as np
+from hashtron.hash.hash import Hash
+
+# Filter file: magic, version, attempts, filter bytes, then the filter
+FILE_MAGIC = b'QUAT'
+FILE_VERSION = 1
 
 def hash_fn(n: int, s: int, max_val: int) -> int:
-    h = hash((n - s, s))
-    # Apply 0xFFFFFFFF mask to ensure the result fits within 32 bits
-    return ((h + s) % max_val) & 0xFFFFFFFF
+    # Deterministic across processes and platforms, unlike the builtin hash()
+    return Hash.hash(n, s, max_val)
 
 def byte_size(n: int) -> int:
     """
@@ -39,17 +46,111 @@ def rotate(n: int) -> int:
     # Apply 0xFFFFFFFF mask to ensure the result fits within 32 bits
     return ((n >> 1) | ((n & 1) << 31)) & 0xFFFFFFFF
 
+def _key_array(keys) -> np.ndarray:
+    """
+    Convert integer keys to uint64, keeping the low 64 bits of negative or huge keys
+    """
+    if not isinstance(keys, np.ndarray) or keys.dtype.kind == 'O':
+        # Python ints, possibly out of the int64 range
+        return np.array([int(k) & 0xFFFFFFFFFFFFFFFF for k in np.asarray(keys, dtype=object).reshape(-1)], dtype=np.uint64)
+    if keys.dtype.kind == 'i':
+        # Same bits as Python's infinite two's complement in the low 64 bits
+        keys = keys.astype(np.int64).view(np.uint64)
+    return keys.astype(np.uint64).reshape(-1)
+
+class BuildStats:
+    def __init__(self, keys: int = 0, passes: int = 0, growths: int = 0, size: int = 0):
+        """
+        Statistics of a filter construction.
+
+        :param keys: Number of keys inserted.
+        :param passes: Number of insertion passes over the keys.
+        :param growths: Number of times the filter was grown and rebuilt.
+        :param size: Final filter size in bytes.
+        """
+        self.keys = keys
+        self.passes = passes
+        self.growths = growths
+        self.size = size
+
+    def bits_per_key(self) -> float:
+        return 8 * self.size / self.keys if self.keys else 0.0
+
+    def __add__(self, other: 'BuildStats') -> 'BuildStats':
+        return BuildStats(self.keys + other.keys, self.passes + other.passes,
+                          self.growths + other.growths, self.size + other.size)
+
+    def __repr__(self) -> str:
+        return (f"BuildStats(keys={self.keys}, passes={self.passes}, growths={self.growths}, "
+                f"size={self.size}, bits_per_key={self.bits_per_key():.2f})")
+
 class Quatenary:
-    def __init__(self, data: Dict[object, bool]):
+    def __init__(self, data: Dict[object, bool] = None, updatable: bool = False):
+        """
+        Quaternary filter answering a boolean for every key it was built from.
+
+        :param data: The keys and their boolean values.
+        :param updatable: Keep a copy of the keys, needed by `set` and `update`.
+            Off by default, the filter then only holds its bit array.
+        """
         self.attemps = 64
-        self._create(data)
-        
+        self.filter = bytearray()
+        self.stats = BuildStats()
+        # Share of the cells which may turn to trash through updates before a rebuild
+        self.max_trash = 0.1
+        self.rebuilds = 0
+        # The keys and values, kept for updates only
+        self.data = None
+        if updatable:
+            self.data = {k: bool(v) for k, v in data.items()} if data else {}
+        # Cell where the lookup of every key ends, and the keys ending in every cell
+        self._terminal = None
+        self._owners = None
+        self._trash = 0
+        self._trash_limit = 0
+        if data:
+            self._create(self.data if updatable else data)
+
+    def save(self, file_name: str) -> None:
+        """
+        Save the filter to a binary file, see `load`.
+        """
+        with open(file_name, 'wb') as f:
+            f.write(FILE_MAGIC)
+            f.write(FILE_VERSION.to_bytes(4, 'little'))
+            f.write(self.attemps.to_bytes(4, 'little'))
+            f.write(len(self.filter).to_bytes(4, 'little'))
+            f.write(self.filter)
+
+    @staticmethod
+    def load(file_name: str) -> 'Quatenary':
+        """
+        Load a filter saved by `save`.
+
+        The file is memory-mapped and queried in place, without rebuilding.
+        """
+        with open(file_name, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if data[:4] != FILE_MAGIC:
+            raise ValueError("unknown filter format: not a quaternary filter file")
+        version = int.from_bytes(data[4:8], 'little')
+        if version != FILE_VERSION:
+            raise ValueError(f"unsupported quaternary filter version {version}")
+        size = int.from_bytes(data[12:16], 'little')
+        if len(data) < 16 + size:
+            raise ValueError("truncated quaternary filter file")
+        filt = Quatenary()
+        filt.data = None
+        filt.attemps = int.from_bytes(data[8:12], 'little')
+        filt.filter = memoryview(data)[16:16 + size]
+        return filt
     
     def _create(self, data: Dict[object, bool]):
         if len(data) == 0:
             return
         current_bytes_size = byte_size(grow(len(data)))
         self.filter = bytearray(current_bytes_size)
+        self.stats = BuildStats(len(data))
         max_load = len(data)
 
         while True:
@@ -64,17 +165,111 @@ class Quatenary:
                 is_mutated = is_mutated and new_inserted > 0
                 # ^ Is mutated if still have collisions
                 load += new_inserted
+                self.stats.passes += 1
             if is_mutated:
                 # Increate size
                 current_bytes_size = byte_size(grow(cell_size(len(self.filter))))
                 self.filter = bytearray(current_bytes_size)
                 max_load = grow(max_load)
+                self.stats.growths += 1
             else:
                 # Ready
+                self.stats.size = len(self.filter)
                 break
 
 
-    def _set(self, key: object, answer: bool):
+    def set(self, key: object, value: bool) -> None:
+        """
+        Insert or change a single key, see `update`.
+        """
+        self.update({key: value})
+
+    def update(self, data: Dict[object, bool]) -> None:
+        """
+        Insert or change keys of an existing filter, without rebuilding it.
+
+        A key is written like during construction. The keys whose lookup ended
+        in a cell that the write changed are inserted again, until no cell
+        changes. The filter is rebuilt from all its keys, at a size fitting
+        them, only when a key can't be inserted or when updates have turned
+        more than `max_trash` of the cells to trash since the last build.
+
+        :param data: The keys and their new boolean values.
+        :raises ValueError: If the filter doesn't keep its keys, it wasn't built
+            with `updatable` or it was loaded from a file.
+        """
+        if self.data is None:
+            raise ValueError("the quaternary filter doesn't keep its keys, build it with updatable=True")
+        pending = []
+        for k, v in data.items():
+            v = bool(v)
+            if k not in self.data or self.data[k] != v:
+                self.data[k] = v
+                pending.append(k)
+        if not pending:
+            return
+        if not self.filter:
+            self._rebuild()
+            return
+        if self._owners is None:
+            self._index()
+        while pending:
+            key = pending.pop()
+            changed = []
+            self._set(key, self.data[key], changed)
+            for cell in changed:
+                if self._cell(cell) == 3:
+                    self._trash += 1
+                # The keys ending in a changed cell must be inserted again
+                for other in self._owners.pop(cell, ()):
+                    del self._terminal[other]
+                    if other != key:
+                        pending.append(other)
+            terminal = self._probe(key)
+            if terminal < 0 or self._trash > self._trash_limit:
+                self._rebuild()
+                return
+            old = self._terminal.get(key)
+            if old is not None and old != terminal:
+                self._owners[old].discard(key)
+            self._terminal[key] = terminal
+            self._owners.setdefault(terminal, set()).add(key)
+
+    def _rebuild(self):
+        self._create(self.data)
+        self._terminal = None
+        self._owners = None
+        self.rebuilds += 1
+
+    def _index(self):
+        self._terminal = {}
+        self._owners = {}
+        for k in self.data:
+            terminal = self._probe(k)
+            self._terminal[k] = terminal
+            self._owners.setdefault(terminal, set()).add(k)
+        filt = np.frombuffer(self.filter, dtype=np.uint8)
+        self._trash = int(sum(np.count_nonzero((filt >> shift) & 3 == 3) for shift in (0, 2, 4, 6)))
+        self._trash_limit = self._trash + int(self.max_trash * cell_size(len(self.filter)))
+
+    def _cell(self, h: int) -> int:
+        return (self.filter[h >> 2] >> ((h & 3) * 2)) & 0b11
+
+    def _probe(self, key: object) -> int:
+        """
+        The cell where the lookup of key ends, -1 if all its cells are trash
+        """
+        current_cells_size = cell_size(len(self.filter))
+        x = key
+        high = key >> 32
+        for i in range(self.attemps):
+            h = hash_fn(x, high ^ i, current_cells_size)
+            if self._cell(h) != 3:
+                return h
+            x = rotate(x)
+        return -1
+
+    def _set(self, key: object, answer: bool, changed: list = None):
         if not self.filter:
             return 1
         
@@ -97,6 +292,8 @@ class Quatenary:
                     return inserted
                 # No math answer. Store answer in cell
                 self.filter[idx] |= ((int(answer) & 1) + 1) << shift
+                if changed is not None:
+                    changed.append(h)
                 inserted += 1
                 return inserted
             elif val == 1 and answer == 0:
@@ -107,11 +304,14 @@ class Quatenary:
                 # Again. same value from previous key. Use it for this one as well for saving space.
                 return inserted
             elif val == 3:
-                # ^ Trash cell
-                pass # Try again
+                # ^ Trash cell, nothing changes here. Try again
+                x = rotate(x)  # rotate x right
+                continue
 
-            # Mark collision if not already
+            # Mark collision
             self.filter[idx] |= 0b11 << shift
+            if changed is not None:
+                changed.append(h)
             x = rotate(x)  # rotate x right
             inserted += 1
 
@@ -143,6 +343,121 @@ class Quatenary:
         # Default
         return False
 
+    def get_many(self, keys) -> np.ndarray:
+        """
+        Look up many integer keys at once, same answers as `get`.
+
+        Every round probes all the unresolved keys together, the keys which
+        hit a trash cell are rotated and probed again in the next round.
+
+        :param keys: Array-like of integer keys, fitting into 64 bits.
+        :return: Boolean array with the answer for every key.
+        """
+        keys = _key_array(keys)
+        x = keys.copy()
+        out = (x & np.uint64(1)) == 1
+        if len(self.filter) == 0:
+            return out
+        out[:] = False
+        current_cells_size = cell_size(len(self.filter))
+        high = (keys >> np.uint64(32)).astype(np.uint32)
+        filt = np.frombuffer(self.filter, dtype=np.uint8)
+        pending = np.arange(len(keys))
+        for i in range(self.attemps):
+            if len(pending) == 0:
+                break
+            h = Hash.hash_array(x[pending], high[pending] ^ np.uint32(i), current_cells_size)
+            val = (filt[h >> np.uint32(2)] >> ((h & np.uint32(3)) * np.uint32(2))) & np.uint8(0b11)
+            # Math answer for empty cells, else the stored answer
+            out[pending] = np.where(val == 0, (x[pending] & np.uint64(1)) == 1, val == 2)
+            # Trash cells, rotate the keys for new cell positions
+            pending = pending[val == 3]
+            xp = x[pending]
+            x[pending] = ((xp >> np.uint64(1)) | ((xp & np.uint64(1)) << np.uint64(31))) & np.uint64(0xFFFFFFFF)
+        # Default
+        out[pending] = False
+        return out
+
+
+
+# Salt of the shard selection, distinct from the high ^ attempt salts of the filter cells
+SHARD_SALT = 0xFFFFFFFF
+
+def _build_shard(data: Dict[object, bool]):
+    shard = Quatenary(data)
+    # The keys stay in the parent, only the filter travels back
+    return shard.filter, shard.stats
+
+class ShardedQuatenary:
+    def __init__(self, data: Dict[object, bool], shards: int = None, processes: int = None, updatable: bool = False):
+        """
+        Quaternary filter made of independent sub-filters, built in parallel.
+
+        Keys are partitioned by hash into the shards, every shard is an
+        ordinary Quatenary built in a process pool.
+
+        :param data: The keys and their boolean values.
+        :param shards: Number of shards, defaults to the number of processes.
+        :param processes: Number of worker processes, defaults to the CPU count,
+            1 builds the shards in this process.
+        :param updatable: Keep the keys of every shard, needed by `set` and `update`.
+        """
+        self.shards_count = shards or processes or multiprocessing.cpu_count()
+        keys = list(data)
+        parts = [{} for _ in range(self.shards_count)]
+        for k, j in zip(keys, self._shard_of(keys).tolist()):
+            parts[j][k] = bool(data[k])
+        if processes == 1:
+            built = [_build_shard(part) for part in parts]
+        else:
+            with multiprocessing.Pool(processes) as pool:
+                built = pool.map(_build_shard, parts)
+        self.shards = []
+        for (filt, stats), part in zip(built, parts):
+            shard = Quatenary()
+            shard.filter = filt
+            shard.stats = stats
+            shard.data = part if updatable else None
+            self.shards.append(shard)
+        self.stats = sum((shard.stats for shard in self.shards), BuildStats())
+
+    def _shard_of(self, keys) -> np.ndarray:
+        keys = _key_array(keys)
+        high = (keys >> np.uint64(32)).astype(np.uint32)
+        return Hash.hash_array(keys, high ^ np.uint32(SHARD_SALT), self.shards_count)
+
+    def set(self, key: object, value: bool) -> None:
+        self.update({key: value})
+
+    def update(self, data: Dict[object, bool]) -> None:
+        """
+        Insert or change keys, every shard is updated in place, see `Quatenary.update`.
+        """
+        keys = list(data)
+        parts = [{} for _ in range(self.shards_count)]
+        for k, j in zip(keys, self._shard_of(keys).tolist()):
+            parts[j][k] = data[k]
+        for shard, part in zip(self.shards, parts):
+            if part:
+                shard.update(part)
+        self.stats = sum((shard.stats for shard in self.shards), BuildStats())
+
+    def get(self, key: object) -> bool:
+        high = key >> 32
+        return self.shards[hash_fn(key, high ^ SHARD_SALT, self.shards_count)].get(key)
+
+    def get_many(self, keys) -> np.ndarray:
+        """
+        Look up many integer keys at once, same answers as `get`.
+        """
+        keys = _key_array(keys)
+        shard_of = self._shard_of(keys)
+        out = np.empty(len(keys), dtype=bool)
+        for j, shard in enumerate(self.shards):
+            idx = np.nonzero(shard_of == j)[0]
+            if len(idx):
+                out[idx] = shard.get_many(keys[idx])
+        return out
 
 
 if __name__ == '__main__':
@@ -0,0 +1,122 @@
+import unittest
+import os
+import random
+import tempfile
+import numpy as np
+from hashtron.quaternary import Quatenary, ShardedQuatenary
+
+def random_data(count, seed):
+    rng = random.Random(seed)
+    return {rng.getrandbits(40): rng.random() < 0.5 for _ in range(count)}
+
+class TestQuatenary(unittest.TestCase):
+    def test_get(self):
+        data = random_data(2000, 0)
+        filt = Quatenary(data)
+        for k, v in data.items():
+            self.assertEqual(filt.get(k), v)
+
+    def test_deterministic(self):
+        data = random_data(500, 1)
+        self.assertEqual(Quatenary(data).filter, Quatenary(dict(reversed(list(data.items())))).filter)
+
+    def test_save_load(self):
+        data = random_data(2000, 2)
+        filt = Quatenary(data)
+        with tempfile.TemporaryDirectory() as d:
+            file_name = os.path.join(d, 'filter.quat')
+            filt.save(file_name)
+            loaded = Quatenary.load(file_name)
+            self.assertEqual(bytes(loaded.filter), bytes(filt.filter))
+            for k, v in data.items():
+                self.assertEqual(loaded.get(k), v)
+            del loaded
+
+    def test_get_many(self):
+        data = random_data(2000, 3)
+        filt = Quatenary(data)
+        rng = random.Random(3)
+        keys = list(data) + [rng.getrandbits(40) for _ in range(1000)] + [-5, -(1 << 40), (1 << 63) + 3]
+        self.assertEqual(filt.get_many(keys).tolist(), [filt.get(k) for k in keys])
+        self.assertEqual(filt.get_many(np.array(keys[:-1], dtype=np.int64)).tolist(), [filt.get(k) for k in keys[:-1]])
+
+    def test_stats(self):
+        filt = Quatenary(random_data(2000, 4))
+        self.assertEqual(filt.stats.keys, 2000)
+        self.assertEqual(filt.stats.size, len(filt.filter))
+        self.assertGreater(filt.stats.passes, 0)
+        self.assertLess(filt.stats.bits_per_key(), 8)
+
+    def test_sharded(self):
+        data = random_data(4000, 5)
+        filt = ShardedQuatenary(data, shards=4, processes=2)
+        self.assertEqual(len(filt.shards), 4)
+        self.assertEqual(filt.stats.keys, 4000)
+        for k, v in data.items():
+            self.assertEqual(filt.get(k), v)
+        keys = list(data) + [-5, 1 << 70]
+        self.assertEqual(filt.get_many(keys).tolist(), [filt.get(k) for k in keys])
+
+    def test_update(self):
+        data = random_data(2000, 6)
+        filt = Quatenary(data, updatable=True)
+        rng = random.Random(6)
+        for _ in range(500):
+            k, v = rng.getrandbits(40), rng.random() < 0.5
+            filt.set(k, v)
+            data[k] = v
+        changes = {k: not data[k] for k in list(data)[:300]}
+        filt.update(changes)
+        data.update(changes)
+        for k, v in data.items():
+            self.assertEqual(filt.get(k), v)
+        self.assertEqual(filt.rebuilds, 0)
+
+    def test_update_grows(self):
+        filt = Quatenary(updatable=True)
+        data = random_data(3000, 7)
+        for k, v in data.items():
+            filt.set(k, v)
+        for k, v in data.items():
+            self.assertEqual(filt.get(k), v)
+        self.assertEqual(len(filt.data), len(data))
+        # Rebuilds grow geometrically with the keys, not once per insert
+        self.assertLess(filt.rebuilds, 40)
+
+    def test_update_not_updatable(self):
+        filt = Quatenary(random_data(100, 8))
+        self.assertIsNone(filt.data)
+        with self.assertRaises(ValueError):
+            filt.set(1, False)
+        sharded = ShardedQuatenary(random_data(100, 8), shards=2, processes=1)
+        with self.assertRaises(ValueError):
+            sharded.update({1: False})
+
+    def test_update_loaded(self):
+        filt = Quatenary(random_data(100, 8), updatable=True)
+        with tempfile.TemporaryDirectory() as d:
+            file_name = os.path.join(d, 'filter.quat')
+            filt.save(file_name)
+            loaded = Quatenary.load(file_name)
+            with self.assertRaises(ValueError):
+                loaded.set(1, False)
+            del loaded
+
+    def test_sharded_update(self):
+        data = random_data(2000, 9)
+        filt = ShardedQuatenary(data, shards=3, processes=1, updatable=True)
+        changes = random_data(500, 10)
+        changes.update({k: not data[k] for k in list(data)[:100]})
+        filt.update(changes)
+        data.update(changes)
+        for k, v in data.items():
+            self.assertEqual(filt.get(k), v)
+
+    def test_empty(self):
+        filt = Quatenary({})
+        self.assertTrue(filt.get(1))
+        self.assertFalse(filt.get(2))
+        self.assertEqual(filt.get_many([1, 2]).tolist(), [True, False])
+
+if __name__ == '__main__':
+    unittest.main()
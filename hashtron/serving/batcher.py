@@ -0,0 +1,181 @@
+import asyncio
+import collections
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+class Overloaded(Exception):
+    """Raised by `MicroBatcher.submit` when the request queue is full."""
+
+def _percentile(ordered: list, p: float) -> float:
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] if ordered else 0.0
+
+class LatencyStats:
+    def __init__(self, window: int = 10000):
+        """
+        Latency percentiles over the most recent requests.
+
+        :param window: Number of recent latencies kept.
+        """
+        self.latencies = collections.deque(maxlen=window)
+        self.requests = 0
+        self.batches = 0
+        self.batched = 0
+        # Requests refused because the queue was full
+        self.rejected = 0
+
+    def record_batch(self, latencies: list) -> None:
+        self.latencies.extend(latencies)
+        self.requests += len(latencies)
+        self.batches += 1
+        self.batched += len(latencies)
+
+    def percentile(self, p: float) -> float:
+        """
+        The p-th percentile latency in seconds, 0 without requests.
+        """
+        return _percentile(sorted(self.latencies), p)
+
+    def as_dict(self) -> dict:
+        ordered = sorted(self.latencies)
+        return {
+            'requests': self.requests,
+            'rejected': self.rejected,
+            'batches': self.batches,
+            'mean_batch_size': self.batched / self.batches if self.batches else 0.0,
+            'p50': _percentile(ordered, 50),
+            'p90': _percentile(ordered, 90),
+            'p99': _percentile(ordered, 99),
+            'max': ordered[-1] if ordered else 0.0,
+        }
+
+class MicroBatcher:
+    def __init__(self, fn, max_batch_size: int = 64, max_wait: float = 0.002, workers: int = 1, executor=None,
+                 max_queue: int = 1024):
+        """
+        Collect concurrent requests into batches evaluated off the event loop.
+
+        A batch is dispatched once it holds `max_batch_size` requests or its
+        first request has waited `max_wait` seconds. At most `workers` batches
+        are evaluated at a time.
+
+        :param fn: Evaluates a list of inputs, returning the list of outputs,
+            like `FeedforwardNetwork.infer_batch`.
+        :param max_batch_size: Maximum number of requests in a batch.
+        :param max_wait: Maximum time in seconds a request waits for its batch to fill.
+        :param workers: Number of batches evaluated concurrently.
+        :param executor: Executor running `fn`, defaults to a thread pool of `workers` threads.
+        :param max_queue: Maximum number of requests waiting for a batch, `submit`
+            raises `Overloaded` beyond it. 0 for no limit.
+        """
+        if max_batch_size <= 0:
+            raise ValueError("batch size must be positive")
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.workers = workers
+        self.executor = executor
+        self.max_queue = max_queue
+        self.stats = LatencyStats()
+        self._own_executor = executor is None
+        self._queue = None
+        self._task = None
+        self._slots = None
+        self._running = set()
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of requests waiting for a batch."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(self.workers)
+        self._queue = asyncio.Queue(self.max_queue)
+        self._slots = asyncio.Semaphore(self.workers)
+        self._task = asyncio.get_running_loop().create_task(self._collect())
+
+    async def close(self) -> None:
+        """
+        Stop collecting, the batches in flight complete, queued requests are cancelled.
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+        while not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            future.cancel()
+        if self._own_executor:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+    async def submit(self, sample):
+        """
+        Evaluate one input as part of a batch.
+
+        :return: The output of `fn` for the input.
+        :raises Overloaded: If `max_queue` requests are already waiting.
+        """
+        if self._task is None:
+            await self.start()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((sample, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.stats.rejected += 1
+            raise Overloaded(f"overloaded, {self.max_queue} requests queued") from None
+        return await future
+
+    async def _collect(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            try:
+                deadline = loop.time() + self.max_wait
+                while len(batch) < self.max_batch_size:
+                    if self._queue.empty():
+                        timeout = deadline - loop.time()
+                        if timeout <= 0:
+                            break
+                        try:
+                            batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                        except asyncio.TimeoutError:
+                            break
+                    else:
+                        batch.append(self._queue.get_nowait())
+                await self._slots.acquire()
+            except asyncio.CancelledError:
+                for _, future, _ in batch:
+                    future.cancel()
+                raise
+            task = loop.create_task(self._evaluate(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _evaluate(self, batch: list) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+            try:
+                outputs = await loop.run_in_executor(self.executor, self.fn, [sample for sample, _, _ in batch])
+                if len(outputs) != len(batch):
+                    raise ValueError(f"batch of {len(batch)} inputs evaluated to {len(outputs)} outputs")
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            done = time.perf_counter()
+            self.stats.record_batch([done - start for _, _, start in batch])
+            for (_, future, _), output in zip(batch, outputs):
+                if not future.done():
+                    future.set_result(output)
+        finally:
+            self._slots.release()
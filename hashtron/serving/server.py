@@ -0,0 +1,210 @@
+"""
+Asyncio inference server speaking line-delimited JSON over TCP or a unix socket.
+
+Every request is one JSON object per line, answered by one line:
+
+    {"id": 1, "op": "infer", "input": 42}             -> {"id": 1, "output": 3}
+    {"id": 2, "op": "infer", "input": {"bytes": "<base64>", "balanced": true}}
+    {"id": 3, "op": "infer", "input": {"string": "hello"}}
+    {"id": 4, "op": "stats"}                          -> {"id": 4, "stats": {...}}
+
+Responses of one connection may arrive out of order, the id pairs them with
+the requests. Concurrent requests are evaluated together in micro-batches,
+see `MicroBatcher`. When too many requests are queued, new ones are
+answered with an "overloaded" error. A request line longer than the server
+limit is answered with an error and skipped.
+
+    python -m hashtron.serving.server --net mypackage.nets:mnist_net --weights model.bin --port 8000
+"""
+
+import argparse
+import asyncio
+import base64
+import importlib
+import json
+from hashtron.serving.batcher import MicroBatcher
+from hashtron.datasets.stringhash.bytehash import ByteSample, BalancedByteSample
+from hashtron.datasets.stringhash import stringhash
+
+def default_decode(value):
+    """
+    Decode the JSON input of a request into a network input.
+
+    Integers are used as they are, {"bytes": base64} becomes a `ByteSample`
+    and {"string": text} a string `Sample`, their balanced variants with
+    "balanced": true.
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, dict):
+        balanced = bool(value.get('balanced'))
+        if 'bytes' in value:
+            buf = base64.b64decode(value['bytes'])
+            return BalancedByteSample(buf, 0) if balanced else ByteSample(buf, 0)
+        if 'string' in value:
+            cls = stringhash.BalancedSample if balanced else stringhash.Sample
+            return cls(str(value['string']))
+    raise ValueError(f"unsupported input {value!r}")
+
+class InferenceServer:
+    def __init__(self, net, max_batch_size: int = 64, max_wait: float = 0.002, workers: int = 1, decode=default_decode,
+                 limit: int = 16 << 20, max_queue: int = 1024):
+        """
+        Serve the inferences of a network, batching concurrent requests.
+
+        :param net: The `Net` to serve, with its weights loaded.
+        :param max_batch_size: Maximum number of requests evaluated together.
+        :param max_wait: Maximum time in seconds a request waits for its batch to fill.
+        :param workers: Number of batches evaluated concurrently in worker threads,
+            sharing the network, its cache and its stats.
+        :param decode: Turns the JSON input of a request into a network input.
+        :param limit: Maximum length in bytes of a request line.
+        :param max_queue: Maximum number of requests waiting for a batch, further
+            requests are answered with an "overloaded" error. 0 for no limit.
+        """
+        self.net = net
+        self.decode = decode
+        self.limit = limit
+        self.batcher = MicroBatcher(net.network.infer_batch, max_batch_size, max_wait, workers, max_queue=max_queue)
+        self.server = None
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0, path: str = None):
+        """
+        Start listening, on a unix socket when `path` is given, else on TCP.
+
+        :return: The `asyncio.Server`.
+        """
+        await self.batcher.start()
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self._handle, path, limit=self.limit)
+        else:
+            self.server = await asyncio.start_server(self._handle, host, port, limit=self.limit)
+        return self.server
+
+    async def close(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+        await self.batcher.close()
+
+    def stats(self) -> dict:
+        """
+        Queue depth, request and batch counts and latency percentiles in seconds.
+        """
+        stats = self.batcher.stats.as_dict()
+        stats['queue_depth'] = self.batcher.queue_depth
+        return stats
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        lock = asyncio.Lock()
+        pending = set()
+
+        async def respond(response: dict):
+            async with lock:
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+
+        async def infer(rid, value):
+            try:
+                output = await self.batcher.submit(self.decode(value))
+                await respond({'id': rid, 'output': output})
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await respond({'id': rid, 'error': str(e)})
+
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b'\n')
+                except asyncio.IncompleteReadError as e:
+                    # The last line, without a newline
+                    line = e.partial
+                except asyncio.LimitOverrunError:
+                    await self._skip_line(reader)
+                    await respond({'id': None, 'error': f"request longer than {self.limit} bytes"})
+                    continue
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("request must be a JSON object")
+                except ValueError as e:
+                    await respond({'id': None, 'error': str(e)})
+                    continue
+                rid = request.get('id')
+                op = request.get('op', 'infer')
+                if op == 'infer':
+                    task = asyncio.get_running_loop().create_task(infer(rid, request.get('input')))
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+                elif op == 'stats':
+                    await respond({'id': rid, 'stats': self.stats()})
+                else:
+                    await respond({'id': rid, 'error': f"unknown op {op!r}"})
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for task in pending:
+                task.cancel()
+            writer.close()
+
+    @staticmethod
+    async def _skip_line(reader: asyncio.StreamReader) -> None:
+        """
+        Drop the rest of a line too long for the reader buffer, up to its newline.
+        """
+        while True:
+            try:
+                await reader.readuntil(b'\n')
+                return
+            except asyncio.LimitOverrunError as e:
+                await reader.readexactly(e.consumed)
+
+def load_net(factory: str, weights: str = None):
+    """
+    Build a network from "module:function" and load its weights, binary or zlib JSON.
+    """
+    module, _, name = factory.partition(':')
+    net = getattr(importlib.import_module(module), name)()
+    if weights:
+        if weights.endswith('.zlib'):
+            ok = net.io.read_zlib_weights_from_file(weights)
+        else:
+            ok = net.io.read_binary_weights_from_file(weights)
+        if not ok:
+            raise ValueError(f"weights {weights} don't match the network {factory}")
+    return net
+
+async def serve(server: InferenceServer, host: str, port: int, path: str = None) -> None:
+    await server.start(host, port, path)
+    try:
+        await server.server.serve_forever()
+    finally:
+        await server.close()
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description='Serve a hashtron network.')
+    parser.add_argument('--net', required=True, help='module:function returning the Net')
+    parser.add_argument('--weights', help='weights file, .zlib or binary')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--unix', help='listen on this unix socket path instead of TCP')
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--max-wait', type=float, default=0.002, help='seconds')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--limit', type=int, default=16 << 20, help='maximum request line length in bytes')
+    parser.add_argument('--max-queue', type=int, default=1024, help='maximum queued requests, 0 for no limit')
+    args = parser.parse_args(argv)
+    server = InferenceServer(load_net(args.net, args.weights), args.max_batch_size, args.max_wait, args.workers,
+                             limit=args.limit, max_queue=args.max_queue)
+    asyncio.run(serve(server, args.host, args.port, args.unix))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+import unittest
+import asyncio
+import threading
+from hashtron.serving.batcher import MicroBatcher, LatencyStats, Overloaded
+
+
+class TestMicroBatcher(unittest.TestCase):
+    def test_batches(self):
+        sizes = []
+
+        def double(xs):
+            sizes.append(len(xs))
+            return [2 * x for x in xs]
+
+        async def run():
+            batcher = MicroBatcher(double, max_batch_size=8, max_wait=0.05)
+            out = await asyncio.gather(*(batcher.submit(i) for i in range(30)))
+            await batcher.close()
+            return out, batcher.stats
+
+        out, stats = asyncio.run(run())
+        self.assertEqual(out, [2 * i for i in range(30)])
+        self.assertEqual(sizes, [8, 8, 8, 6])
+        self.assertEqual(stats.requests, 30)
+        self.assertEqual(stats.batches, 4)
+
+    def test_max_wait(self):
+        async def run():
+            batcher = MicroBatcher(lambda xs: xs, max_batch_size=100, max_wait=0.001)
+            first = await batcher.submit(1)
+            second = await batcher.submit(2)
+            await batcher.close()
+            return first, second, batcher.stats.batches
+
+        self.assertEqual(asyncio.run(run()), (1, 2, 2))
+
+    def test_error(self):
+        def fail(xs):
+            raise RuntimeError("bad batch")
+
+        async def run():
+            batcher = MicroBatcher(fail)
+            try:
+                with self.assertRaises(RuntimeError):
+                    await batcher.submit(1)
+            finally:
+                await batcher.close()
+
+        asyncio.run(run())
+
+    def test_short_output(self):
+        async def run():
+            # Drops the last output of every batch
+            batcher = MicroBatcher(lambda xs: xs[:-1], max_batch_size=4, max_wait=0.05)
+            try:
+                return await asyncio.gather(*(batcher.submit(i) for i in range(4)), return_exceptions=True)
+            finally:
+                await batcher.close()
+
+        out = asyncio.run(run())
+        self.assertEqual(len(out), 4)
+        for result in out:
+            self.assertIsInstance(result, ValueError)
+
+    def test_max_queue(self):
+        release = threading.Event()
+
+        def blocked(xs):
+            release.wait()
+            return xs
+
+        async def run():
+            batcher = MicroBatcher(blocked, max_batch_size=1, max_wait=0, max_queue=2)
+            try:
+                tasks = [asyncio.ensure_future(batcher.submit(i)) for i in range(10)]
+                await asyncio.sleep(0.05)
+                release.set()
+                return await asyncio.gather(*tasks, return_exceptions=True), batcher.stats
+            finally:
+                release.set()
+                await batcher.close()
+
+        out, stats = asyncio.run(run())
+        rejected = [i for i, r in enumerate(out) if isinstance(r, Overloaded)]
+        self.assertTrue(rejected)
+        self.assertEqual([r for r in out if not isinstance(r, Overloaded)], [i for i in range(10) if i not in rejected])
+        self.assertEqual(stats.rejected, len(rejected))
+        self.assertEqual(stats.requests, 10 - len(rejected))
+
+    def test_percentiles(self):
+        stats = LatencyStats()
+        stats.record_batch([i / 100 for i in range(100)])
+        self.assertEqual(stats.percentile(50), 0.5)
+        self.assertEqual(stats.as_dict()['p99'], 0.99)
+        self.assertEqual(stats.as_dict()['mean_batch_size'], 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
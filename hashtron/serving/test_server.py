@@ -0,0 +1,145 @@
+import unittest
+import asyncio
+import base64
+import json
+import threading
+from hashtron.serving.server import InferenceServer
+from hashtron.datasets.stringhash.bytehash import BalancedByteSample
+from benchmarks.workloads import mnist_net, sqrt_net, byte_samples
+
+
+async def request_lines(port, requests):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    for request in requests:
+        writer.write(json.dumps(request).encode() + b'\n')
+    await writer.drain()
+    responses = [json.loads(await reader.readline()) for _ in requests]
+    writer.close()
+    return {r['id']: r for r in responses}
+
+
+class TestInferenceServer(unittest.TestCase):
+    def serve(self, net, client, **kwargs):
+        async def run():
+            options = {'max_batch_size': 16, 'max_wait': 0.01}
+            options.update(kwargs)
+            setup = options.pop('setup', None)
+            server = InferenceServer(net, **options)
+            if setup is not None:
+                setup(server)
+            await server.start()
+            port = server.server.sockets[0].getsockname()[1]
+            try:
+                return await client(port), server.stats()
+            finally:
+                await server.close()
+
+        return asyncio.run(run())
+
+    def test_infer(self):
+        tron = sqrt_net(11)
+
+        async def client(port):
+            # Several connections at once, batched together
+            chunks = [[{'id': i, 'op': 'infer', 'input': i} for i in range(j, 100, 4)] for j in range(4)]
+            results = await asyncio.gather(*(request_lines(port, chunk) for chunk in chunks))
+            merged = {}
+            for r in results:
+                merged.update(r)
+            merged.update(await request_lines(port, [{'id': 'stats', 'op': 'stats'}]))
+            return merged
+
+        responses, stats = self.serve(tron, client)
+        self.assertEqual([responses[i]['output'] for i in range(100)], [tron.network.infer(i) for i in range(100)])
+        self.assertEqual(responses['stats']['stats']['requests'], 100)
+        self.assertLess(stats['batches'], 100)
+        self.assertEqual(stats['queue_depth'], 0)
+        self.assertGreaterEqual(stats['p99'], stats['p50'])
+
+    def test_workers(self):
+        tron = sqrt_net(14)
+        expected = [tron.network.infer(i) for i in range(20)]
+        cache = tron.network.enable_cache(8)
+
+        async def client(port):
+            # Repeated inputs on concurrent batches hit and evict the shared cache
+            chunks = [[{'id': k, 'input': k % 20} for k in range(j, 400, 8)] for j in range(8)]
+            merged = {}
+            for r in await asyncio.gather(*(request_lines(port, chunk) for chunk in chunks)):
+                merged.update(r)
+            return merged
+
+        responses, stats = self.serve(tron, client, workers=4, max_batch_size=4)
+        self.assertEqual([responses[k]['output'] for k in range(400)], [expected[k % 20] for k in range(400)])
+        self.assertGreater(cache.hits, 0)
+        self.assertEqual(stats['requests'], 400)
+
+    def test_bytes(self):
+        tron = mnist_net(12)
+        samples = [s for s in byte_samples(10, seed=12)]
+
+        async def client(port):
+            return await request_lines(port, [
+                {'id': i, 'input': {'bytes': base64.b64encode(s.buf).decode(), 'balanced': isinstance(s, BalancedByteSample)}}
+                for i, s in enumerate(samples)
+            ] + [{'id': 'bad', 'input': 'x'}, {'id': 'op', 'op': 'nope'}])
+
+        responses, _ = self.serve(tron, client)
+        self.assertEqual([responses[i]['output'] for i in range(10)], [tron.network.infer(s) for s in samples])
+        self.assertIn('error', responses['bad'])
+        self.assertIn('error', responses['op'])
+
+    def test_overloaded(self):
+        tron = sqrt_net(15)
+        release = threading.Event()
+
+        def blocked(samples):
+            release.wait()
+            return tron.network.infer_batch(samples)
+
+        async def client(port):
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            for i in range(10):
+                writer.write(json.dumps({'id': i, 'input': i}).encode() + b'\n')
+            await writer.drain()
+            await asyncio.sleep(0.05)
+            release.set()
+            responses = [json.loads(await reader.readline()) for _ in range(10)]
+            writer.close()
+            return {r['id']: r for r in responses}
+
+        def serve_blocked(server):
+            server.batcher.fn = blocked
+
+        try:
+            responses, stats = self.serve(tron, client, max_batch_size=1, max_queue=2, setup=serve_blocked)
+        finally:
+            release.set()
+        overloaded = [i for i in range(10) if 'overloaded' in responses[i].get('error', '')]
+        self.assertTrue(overloaded)
+        for i in range(10):
+            if i not in overloaded:
+                self.assertEqual(responses[i]['output'], tron.network.infer(i))
+        self.assertEqual(stats['rejected'], len(overloaded))
+
+    def test_long_line(self):
+        tron = sqrt_net(13)
+
+        async def client(port):
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            # Longer than the limit and than the reader buffer, then a valid request
+            writer.write(json.dumps({'id': 'long', 'input': 'x' * 5000}).encode() + b'\n')
+            writer.write(json.dumps({'id': 1, 'input': 7}).encode() + b'\n')
+            await writer.drain()
+            responses = [json.loads(await reader.readline()) for _ in range(2)]
+            writer.close()
+            return responses
+
+        responses, _ = self.serve(tron, client, limit=1024)
+        self.assertIsNone(responses[0]['id'])
+        self.assertIn('error', responses[0])
+        self.assertEqual(responses[1], {'id': 1, 'output': tron.network.infer(7)})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,9 +3,10 @@ from setuptools import setup, find_packages
 setup(
     name="hashtron",
     version="0.1.0",
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks", "benchmarks.*"]),
     install_requires=[
         "requests==2.32.3",
+        "numpy",
     ],
     author="Neurlang Project",
     author_email="77860779+neurlang@users.noreply.github.com",